@@ -1,8 +1,11 @@
 # -*- coding: utf-8 -*-
 
-from typing import Dict, List, Optional, Sequence
+from array import array
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
 
 from PySide2 import QtCore, QtWidgets
+import maya.api.OpenMaya as om2
 import maya.cmds as cmds
 import maya.mel as mel
 
@@ -17,10 +20,52 @@ def maya_main_window():
     return wrapInstance(int(ptr), QtWidgets.QWidget)
 
 
+@lru_cache(maxsize=4096)
 def _short_name(node: str) -> str:
     return node.split("|")[-1]
 
 
+def _plug_value(plug: "om2.MPlug") -> float:
+    attr = plug.attribute()
+    if attr.hasFn(om2.MFn.kUnitAttribute):
+        unit_type = om2.MFnUnitAttribute(attr).unitType()
+        if unit_type == om2.MFnUnitAttribute.kAngle:
+            return plug.asMAngle().asUnits(om2.MAngle.uiUnit())
+        if unit_type == om2.MFnUnitAttribute.kDistance:
+            return plug.asMDistance().asUnits(om2.MDistance.uiUnit())
+    return plug.asDouble()
+
+
+def _set_plug_value(plug: "om2.MPlug", value: float):
+    modifier = om2.MDGModifier()
+    attr = plug.attribute()
+    if attr.hasFn(om2.MFn.kUnitAttribute):
+        unit_type = om2.MFnUnitAttribute(attr).unitType()
+        if unit_type == om2.MFnUnitAttribute.kAngle:
+            modifier.newPlugValueMAngle(plug, om2.MAngle(value, om2.MAngle.uiUnit()))
+        elif unit_type == om2.MFnUnitAttribute.kDistance:
+            modifier.newPlugValueMDistance(plug, om2.MDistance(value, om2.MDistance.uiUnit()))
+        else:
+            modifier.newPlugValueDouble(plug, value)
+    else:
+        modifier.newPlugValueDouble(plug, value)
+    modifier.doIt()
+
+
+def _unique(items: Sequence[str]) -> List[str]:
+    seen = set()
+    seen_add = seen.add
+    return [item for item in items if not (item in seen or seen_add(item))]
+
+
+def _set_spin_value(spin: QtWidgets.QDoubleSpinBox, value: float):
+    blocked = spin.blockSignals(True)
+    try:
+        spin.setValue(value)
+    finally:
+        spin.blockSignals(blocked)
+
+
 ANIM_CURVE_TYPES: Sequence[str] = (
     "animCurveUL",
     "animCurveUA",
@@ -28,6 +73,114 @@ ANIM_CURVE_TYPES: Sequence[str] = (
     "animCurveUU",
 )
 
+_TARGET_ATTRS: Tuple[str, ...] = tuple(
+    f"{prefix}{axis}" for prefix in ("translate", "rotate", "scale") for axis in ("X", "Y", "Z")
+)
+_TARGET_ATTR_INDEX: Dict[str, int] = {attr: i for i, attr in enumerate(_TARGET_ATTRS)}
+
+
+class _TargetsModel(QtCore.QAbstractListModel):
+    def __init__(self, parent=None):
+        super(_TargetsModel, self).__init__(parent)
+        self._paths: List[str] = []
+        self._display: List[str] = []
+
+    def set_items(self, paths: List[str]):
+        self.beginResetModel()
+        self._paths = list(paths)
+        self._display = [_short_name(path) for path in self._paths]
+        self.endResetModel()
+
+    def path(self, row: int) -> str:
+        return self._paths[row]
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self._paths)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == QtCore.Qt.DisplayRole:
+            return self._display[index.row()]
+        if role == QtCore.Qt.UserRole:
+            return self._paths[index.row()]
+        return None
+
+
+class _TargetValuesModel(QtCore.QAbstractTableModel):
+
+    def __init__(self, attrs: Sequence[str], parent=None):
+        super(_TargetValuesModel, self).__init__(parent)
+        self._attrs: Tuple[str, ...] = tuple(attrs)
+        self._attr_column: Dict[str, int] = {attr: i for i, attr in enumerate(self._attrs)}
+        self._targets: List[str] = []
+        self._target_index: Dict[str, int] = {}
+        self._values = array("d")
+
+    def set_targets(self, targets: List[str], values: Sequence[float]):
+        self.beginResetModel()
+        self._targets = list(targets)
+        self._target_index = {target: i for i, target in enumerate(self._targets)}
+        self._values = array("d", values)
+        self.endResetModel()
+
+    def value(self, target: str, attr: str) -> Optional[float]:
+        row = self._target_index.get(target)
+        column = self._attr_column.get(attr)
+        if row is None or column is None:
+            return None
+        return self._values[row * len(self._attrs) + column]
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self._targets)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self._attrs)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        value = self._values[index.row() * len(self._attrs) + index.column()]
+        if role == QtCore.Qt.DisplayRole:
+            return "%.4f" % value
+        if role == QtCore.Qt.EditRole:
+            return value
+        return None
+
+    def setData(self, index, value, role=QtCore.Qt.EditRole):
+        if not index.isValid() or role != QtCore.Qt.EditRole:
+            return False
+        self._values[index.row() * len(self._attrs) + index.column()] = float(value)
+        self.dataChanged.emit(index, index, [QtCore.Qt.DisplayRole, QtCore.Qt.EditRole])
+        return True
+
+    def flags(self, index):
+        if not index.isValid():
+            return QtCore.Qt.NoItemFlags
+        return QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable | QtCore.Qt.ItemIsEditable
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if role != QtCore.Qt.DisplayRole:
+            return None
+        if orientation == QtCore.Qt.Horizontal:
+            return self._attrs[section]
+        return _short_name(self._targets[section])
+
+
+class _SpinBoxDelegate(QtWidgets.QStyledItemDelegate):
+    def createEditor(self, parent, option, index):
+        spin = QtWidgets.QDoubleSpinBox(parent)
+        spin.setDecimals(4)
+        spin.setRange(-1_000_000.0, 1_000_000.0)
+        return spin
+
+    def setEditorData(self, editor, index):
+        _set_spin_value(editor, index.data(QtCore.Qt.EditRole) or 0.0)
+
+    def setModelData(self, editor, model, index):
+        editor.interpretText()
+        model.setData(index, editor.value(), QtCore.Qt.EditRole)
+
 
 class DrivenKeyToolDialog(QtWidgets.QDialog):
     MODE_TWIST = "twist"
@@ -46,19 +199,17 @@ class DrivenKeyToolDialog(QtWidgets.QDialog):
         self._current_source: str = ""
         self._manual_source: str = ""
         self._manual_targets: List[str] = []
+        self._plug_cache: Dict[str, Optional[float]] = {}
+        self._mplug_cache: Dict[str, Optional[om2.MPlug]] = {}
+        self._individual_built_for: Optional[Tuple[str, ...]] = None
+        self._selection_job: Optional[int] = None
 
         self._create_widgets()
         self._create_layout()
         self._create_connections()
-        self._update_targets()
+        self._do_update_targets()
 
     def _create_widgets(self):
-        self._target_attr_list = [
-            f"{prefix}{axis}"
-            for prefix in ("translate", "rotate", "scale")
-            for axis in ("X", "Y", "Z")
-        ]
-
         self.mode_combo = QtWidgets.QComboBox()
         self.mode_combo.addItem("Twist", self.MODE_TWIST)
         self.mode_combo.addItem("Half", self.MODE_HALF)
@@ -68,33 +219,18 @@ class DrivenKeyToolDialog(QtWidgets.QDialog):
         self.source_axis_combo = QtWidgets.QComboBox()
         self.source_axis_combo.addItems(["X", "Y", "Z"])
 
-        self.targets_list = QtWidgets.QListWidget()
+        self._targets_model = _TargetsModel(self)
+        self.targets_list = QtWidgets.QListView()
+        self.targets_list.setModel(self._targets_model)
         self.targets_list.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
         self.targets_list.setFocusPolicy(QtCore.Qt.NoFocus)
 
         self.refresh_button = QtWidgets.QPushButton(u"Refresh Targets")
 
-        self.target_groups: Dict[str, Dict[str, QtWidgets.QCheckBox]] = {}
+        self._attr_checkboxes: List[Tuple[str, QtWidgets.QCheckBox]] = []
         self._create_target_checkboxes()
 
-        self.manual_group = QtWidgets.QGroupBox(u"Manual Selection")
-        manual_layout = QtWidgets.QGridLayout(self.manual_group)
-        self.manual_source_display = QtWidgets.QLineEdit()
-        self.manual_source_display.setReadOnly(True)
-        self.manual_source_display.setPlaceholderText(u"No source selected")
-        self.get_source_button = QtWidgets.QPushButton(u"Get Source")
-        manual_layout.addWidget(QtWidgets.QLabel(u"Source:"), 0, 0)
-        manual_layout.addWidget(self.manual_source_display, 0, 1)
-        manual_layout.addWidget(self.get_source_button, 0, 2)
-
-        self.manual_targets_display = QtWidgets.QLineEdit()
-        self.manual_targets_display.setReadOnly(True)
-        self.manual_targets_display.setPlaceholderText(u"No targets selected")
-        self.get_targets_button = QtWidgets.QPushButton(u"Get Targets")
-        manual_layout.addWidget(QtWidgets.QLabel(u"Targets:"), 1, 0)
-        manual_layout.addWidget(self.manual_targets_display, 1, 1)
-        manual_layout.addWidget(self.get_targets_button, 1, 2)
-        self.manual_group.setVisible(False)
+        self.manual_group: Optional[QtWidgets.QGroupBox] = None
 
         self.driver_value_spin = QtWidgets.QDoubleSpinBox()
         self.driver_value_spin.setDecimals(4)
@@ -104,7 +240,7 @@ class DrivenKeyToolDialog(QtWidgets.QDialog):
         self.target_value_layout = QtWidgets.QGridLayout(self.target_value_group)
         self.target_value_inputs: Dict[str, QtWidgets.QDoubleSpinBox] = {}
         self.target_value_labels: Dict[str, QtWidgets.QLabel] = {}
-        for row, attr in enumerate(self._target_attr_list):
+        for row, attr in enumerate(_TARGET_ATTRS):
             label = QtWidgets.QLabel(attr)
             spin = QtWidgets.QDoubleSpinBox()
             spin.setDecimals(4)
@@ -117,20 +253,18 @@ class DrivenKeyToolDialog(QtWidgets.QDialog):
         self.individual_values_group = QtWidgets.QGroupBox(u"Individual Target Values")
         self.individual_values_group.setCheckable(True)
         self.individual_values_group.setChecked(False)
-        individual_group_layout = QtWidgets.QVBoxLayout(self.individual_values_group)
-        self.individual_scroll_area = QtWidgets.QScrollArea()
-        self.individual_scroll_area.setWidgetResizable(True)
-        individual_group_layout.addWidget(self.individual_scroll_area)
-        self.individual_values_widget = QtWidgets.QWidget()
-        self.individual_scroll_area.setWidget(self.individual_values_widget)
-        self.individual_values_layout = QtWidgets.QVBoxLayout(self.individual_values_widget)
-        self.individual_value_inputs: Dict[str, Dict[str, QtWidgets.QDoubleSpinBox]] = {}
-        self.individual_value_labels: Dict[str, Dict[str, QtWidgets.QLabel]] = {}
+        QtWidgets.QVBoxLayout(self.individual_values_group)
+        self._values_model: Optional[_TargetValuesModel] = None
+        self.individual_values_view: Optional[QtWidgets.QTableView] = None
 
         self.set_key_button = QtWidgets.QPushButton(u"Set Driven Key")
         self.edit_curve_button = QtWidgets.QPushButton(u"Edit Curves")
         self.close_button = QtWidgets.QPushButton(u"Close")
 
+        self._refresh_timer = QtCore.QTimer(self)
+        self._refresh_timer.setSingleShot(True)
+        self._refresh_timer.setInterval(50)
+
     def _create_target_checkboxes(self):
         attrs = {
             "translate": ("X", "Y", "Z"),
@@ -143,32 +277,85 @@ class DrivenKeyToolDialog(QtWidgets.QDialog):
             "Z": "#7aa7ff",
         }
         group_box = QtWidgets.QGroupBox()
+        group_box.setStyleSheet(
+            "QCheckBox{spacing:0px;min-width:22px;max-width:22px;min-height:22px;max-height:22px;}"
+            "QCheckBox::indicator{width:16px;height:16px;border-radius:3px;"
+            "background-color:#cccccc;border:1px solid #333;}"
+            + "".join(
+                'QCheckBox[axis="%s"]::indicator{background-color:%s;}' % (axis, color)
+                for axis, color in color_map.items()
+            )
+            + "QCheckBox::indicator:checked{border:2px solid #111;}"
+        )
         layout = QtWidgets.QHBoxLayout(group_box)
         layout.setSpacing(6)
         layout.setContentsMargins(6, 6, 6, 6)
         for prefix, axes in attrs.items():
-            self.target_groups[prefix] = {}
             for axis in axes:
                 cb = QtWidgets.QCheckBox("")
-                cb.setFixedSize(22, 22)
-                cb.setSizePolicy(QtWidgets.QSizePolicy.Fixed, QtWidgets.QSizePolicy.Fixed)
-                color = color_map.get(axis, "#cccccc")
-                cb.setStyleSheet(
-                    "QCheckBox{spacing:0px;}"
-                    "QCheckBox::indicator{width:16px;height:16px;border-radius:3px;"
-                    "background-color:%s;border:1px solid #333;}"
-                    "QCheckBox::indicator:checked{border:2px solid #111;}"
-                    % color
-                )
+                cb.setProperty("axis", axis)
                 if prefix == "rotate" and axis == "X":
                     cb.setChecked(True)
                 layout.addWidget(cb)
-                self.target_groups[prefix][axis] = cb
-                cb.stateChanged.connect(self._update_attribute_visibility)
+                self._attr_checkboxes.append((f"{prefix}{axis}", cb))
+        self._selected_attrs: Tuple[str, ...] = tuple(
+            attr for attr, checkbox in self._attr_checkboxes if checkbox.isChecked()
+        )
+        for _, checkbox in self._attr_checkboxes:
+            checkbox.stateChanged.connect(self._update_attribute_visibility)
         setattr(self, f"trsc_group", group_box)
 
+    def _ensure_manual_group(self) -> QtWidgets.QGroupBox:
+        if self.manual_group is not None:
+            return self.manual_group
+        self.manual_group = QtWidgets.QGroupBox(u"Manual Selection")
+        manual_layout = QtWidgets.QGridLayout(self.manual_group)
+        self.manual_source_display = QtWidgets.QLineEdit()
+        self.manual_source_display.setReadOnly(True)
+        self.manual_source_display.setPlaceholderText(u"No source selected")
+        self.get_source_button = QtWidgets.QPushButton(u"Get Source")
+        manual_layout.addWidget(QtWidgets.QLabel(u"Source:"), 0, 0)
+        manual_layout.addWidget(self.manual_source_display, 0, 1)
+        manual_layout.addWidget(self.get_source_button, 0, 2)
+
+        self.manual_targets_display = QtWidgets.QLineEdit()
+        self.manual_targets_display.setReadOnly(True)
+        self.manual_targets_display.setPlaceholderText(u"No targets selected")
+        self.get_targets_button = QtWidgets.QPushButton(u"Get Targets")
+        manual_layout.addWidget(QtWidgets.QLabel(u"Targets:"), 1, 0)
+        manual_layout.addWidget(self.manual_targets_display, 1, 1)
+        manual_layout.addWidget(self.get_targets_button, 1, 2)
+        self.get_source_button.clicked.connect(self._on_get_source_clicked)
+        self.get_targets_button.clicked.connect(self._on_get_targets_clicked)
+        self._main_layout.insertWidget(
+            self._main_layout.indexOf(self.trsc_group), self.manual_group
+        )
+        return self.manual_group
+
+    def _set_manual_visible(self, visible: bool):
+        if visible:
+            self._ensure_manual_group().setVisible(True)
+        elif self.manual_group is not None:
+            self.manual_group.setVisible(False)
+
+    def _ensure_individual_view(self) -> QtWidgets.QTableView:
+        if self.individual_values_view is not None:
+            return self.individual_values_view
+        self._values_model = _TargetValuesModel(_TARGET_ATTRS, self)
+        self.individual_values_view = QtWidgets.QTableView()
+        self.individual_values_view.setModel(self._values_model)
+        self.individual_values_view.setItemDelegate(_SpinBoxDelegate(self.individual_values_view))
+        self.individual_values_view.setEditTriggers(
+            QtWidgets.QAbstractItemView.DoubleClicked
+            | QtWidgets.QAbstractItemView.EditKeyPressed
+            | QtWidgets.QAbstractItemView.AnyKeyPressed
+        )
+        self.individual_values_group.layout().addWidget(self.individual_values_view)
+        return self.individual_values_view
+
     def _create_layout(self):
         main_layout = QtWidgets.QVBoxLayout(self)
+        self._main_layout = main_layout
 
         mode_layout = QtWidgets.QHBoxLayout()
         mode_layout.addWidget(QtWidgets.QLabel(u"Mode:"))
@@ -182,8 +369,6 @@ class DrivenKeyToolDialog(QtWidgets.QDialog):
         main_layout.addWidget(self.targets_list)
         main_layout.addWidget(self.refresh_button)
 
-        main_layout.addWidget(self.manual_group)
-
         main_layout.addWidget(self.trsc_group)
 
         value_layout = QtWidgets.QFormLayout()
@@ -205,11 +390,11 @@ class DrivenKeyToolDialog(QtWidgets.QDialog):
         self.mode_combo.currentIndexChanged.connect(self._on_mode_changed)
         self.source_axis_combo.currentIndexChanged.connect(self._refresh_value_fields)
         self.refresh_button.clicked.connect(self._update_targets)
+        self._refresh_timer.timeout.connect(self._do_update_targets)
+        self.individual_values_group.toggled.connect(self._on_individual_values_toggled)
         self.set_key_button.clicked.connect(self._set_driven_key)
         self.edit_curve_button.clicked.connect(self._edit_curves)
         self.close_button.clicked.connect(self.close)
-        self.get_source_button.clicked.connect(self._on_get_source_clicked)
-        self.get_targets_button.clicked.connect(self._on_get_targets_clicked)
 
     # region Target search helpers
     def _selected_source_joint(self) -> str:
@@ -235,214 +420,269 @@ class DrivenKeyToolDialog(QtWidgets.QDialog):
         if parent:
             siblings = cmds.listRelatives(parent[0], children=True, type="joint", fullPath=True) or []
         else:
-            siblings = cmds.ls(assemblies=True, type="joint") or []
-        return list(dict.fromkeys(siblings))
+            siblings = cmds.ls(assemblies=True, type="joint", long=True) or []
+        return _unique(siblings)
 
     def _collect_targets(self, source: str) -> List[str]:
         mode = self.mode_combo.currentData()
         candidates: List[str] = []
         if mode == self.MODE_TWIST:
             siblings = self._list_siblings(source)
-            for j in siblings:
-                if j == source:
-                    continue
-                if "twist" in _short_name(j).lower():
-                    candidates.append(j)
+            source_long = (cmds.ls(source, long=True) or [source])[0]
+            candidates = [
+                j for j in siblings if j != source_long and "twist" in _short_name(j).lower()
+            ]
         elif mode == self.MODE_HALF:
-            siblings = self._list_siblings(source)
-            half_joints = [j for j in siblings if "_Half" in _short_name(j)]
-            for half in half_joints:
-                descendants = cmds.listRelatives(half, ad=True, type="joint", fullPath=True) or []
-                for j in descendants:
-                    if "_Half_INF" in _short_name(j):
-                        candidates.append(j)
+            parent = cmds.listRelatives(source, parent=True, fullPath=True) or []
+            if parent:
+                depth = parent[0].count("|") + 1
+                descendants = (
+                    cmds.listRelatives(parent[0], ad=True, type="joint", fullPath=True) or []
+                )
+                half_roots = tuple(
+                    f"{j}|"
+                    for j in descendants
+                    if j.count("|") == depth and "_Half" in _short_name(j)
+                )
+                candidates = [
+                    j
+                    for j in descendants
+                    if "_Half_INF" in _short_name(j) and j.startswith(half_roots)
+                ]
+            else:
+                siblings = self._list_siblings(source)
+                half_joints = [j for j in siblings if "_Half" in _short_name(j)]
+                if half_joints:
+                    descendants = (
+                        cmds.listRelatives(half_joints, ad=True, type="joint", fullPath=True)
+                        or []
+                    )
+                    candidates = [j for j in descendants if "_Half_INF" in _short_name(j)]
         elif mode == self.MODE_SUPPORT:
             children = cmds.listRelatives(source, children=True, type="joint", fullPath=True) or []
             for child in children:
                 if _short_name(child).endswith("_Sup"):
                     candidates.append(child)
-        return list(dict.fromkeys(candidates))
+        return _unique(candidates)
 
     def _update_targets(self):
+        self._refresh_timer.start()
+
+    def _do_update_targets(self):
+        self._invalidate_plug_cache()
         mode = self.mode_combo.currentData()
-        self.manual_group.setVisible(mode == self.MODE_MANUAL)
+        self._set_manual_visible(mode == self.MODE_MANUAL)
         if mode == self.MODE_MANUAL:
             self._apply_manual_selection()
             return
 
         source = self._selected_source_joint()
         if not source:
-            self.targets_list.clear()
+            self._targets_model.set_items([])
             self._target_items = []
             self._current_source = ""
             self._populate_value_inputs("", [])
             return
 
         targets = self._collect_targets(source)
-        self.targets_list.clear()
-        for j in targets:
-            item = QtWidgets.QListWidgetItem(_short_name(j))
-            item.setData(QtCore.Qt.UserRole, j)
-            self.targets_list.addItem(item)
-            item.setSelected(True)
+        self._fill_targets_list(targets)
         self._target_items = targets
         self._current_source = source
         self._populate_value_inputs(source, targets)
 
+    def _fill_targets_list(self, targets: List[str]):
+        self._targets_model.set_items(targets)
+        self.targets_list.selectAll()
+
     # endregion
 
     def _apply_manual_selection(self):
-        self.manual_group.setVisible(self.mode_combo.currentData() == self.MODE_MANUAL)
+        self._invalidate_plug_cache()
+        self._set_manual_visible(self.mode_combo.currentData() == self.MODE_MANUAL)
         source = self._manual_source
-        targets = list(dict.fromkeys(self._manual_targets))
-        self.targets_list.clear()
-        for j in targets:
-            item = QtWidgets.QListWidgetItem(_short_name(j))
-            item.setData(QtCore.Qt.UserRole, j)
-            self.targets_list.addItem(item)
-            item.setSelected(True)
+        targets = _unique(self._manual_targets)
+        self._fill_targets_list(targets)
         self._target_items = targets
         self._current_source = source
         self._populate_value_inputs(source, targets)
         self._update_manual_display()
 
     def _selected_target_attributes(self) -> List[str]:
-        attrs: List[str] = []
-        for prefix, axes in self.target_groups.items():
-            for axis, checkbox in axes.items():
-                if checkbox.isChecked():
-                    attrs.append(f"{prefix}{axis}")
-        return attrs
+        return list(self._selected_attrs)
 
     def _selected_targets(self) -> List[str]:
-        items = self.targets_list.selectedItems()
-        if not items:
-            return []
-        return [data for data in (item.data(QtCore.Qt.UserRole) for item in items) if data]
+        rows = sorted(index.row() for index in self.targets_list.selectionModel().selectedIndexes())
+        return [self._targets_model.path(row) for row in rows]
 
     def _driver_attribute(self, source: str) -> str:
         axis = self.source_axis_combo.currentText()
         return f"{source}.rotate{axis}"
 
-    def _clear_layout(self, layout: QtWidgets.QLayout):
-        while layout.count():
-            item = layout.takeAt(0)
-            widget = item.widget()
-            if widget:
-                widget.deleteLater()
-            else:
-                child_layout = item.layout()
-                if child_layout:
-                    self._clear_layout(child_layout)
-                elif item.spacerItem():
-                    # Spacer item, nothing to delete
-                    continue
+    def _invalidate_plug_cache(self):
+        self._plug_cache = {}
+        self._mplug_cache = {}
+
+    def showEvent(self, event):
+        super(DrivenKeyToolDialog, self).showEvent(event)
+        self._invalidate_plug_cache()
+        if self._selection_job is None:
+            self._selection_job = cmds.scriptJob(
+                event=["SelectionChanged", self._invalidate_plug_cache],
+                parent=self.objectName(),
+            )
+
+    def closeEvent(self, event):
+        if self._selection_job is not None:
+            if cmds.scriptJob(exists=self._selection_job):
+                cmds.scriptJob(kill=self._selection_job, force=True)
+            self._selection_job = None
+        self._invalidate_plug_cache()
+        super(DrivenKeyToolDialog, self).closeEvent(event)
+
+    def _find_plug(self, plug: str) -> Optional[om2.MPlug]:
+        try:
+            return self._mplug_cache[plug]
+        except KeyError:
+            pass
+        node, _, attr = plug.partition(".")
+        found: Optional[om2.MPlug] = None
+        sel = om2.MSelectionList()
+        try:
+            sel.add(node)
+            found = om2.MFnDependencyNode(sel.getDependNode(0)).findPlug(attr, False)
+        except RuntimeError:
+            found = None
+        self._mplug_cache[plug] = found
+        return found
+
+    def _cached_get(self, plug: str) -> Optional[float]:
+        try:
+            return self._plug_cache[plug]
+        except KeyError:
+            pass
+        value: Optional[float] = None
+        mplug = self._find_plug(plug)
+        if mplug is not None:
+            try:
+                value = _plug_value(mplug)
+            except RuntimeError:
+                value = None
+        self._plug_cache[plug] = value
+        return value
+
+    def _prefetch_plug_values(self, targets: List[str]):
+        pending = [t for t in targets if f"{t}.{_TARGET_ATTRS[0]}" not in self._plug_cache]
+        if not pending:
+            return
+        sel = om2.MSelectionList()
+        for target in pending:
+            fn_node: Optional[om2.MFnDependencyNode] = None
+            try:
+                sel.add(target)
+                fn_node = om2.MFnDependencyNode(sel.getDependNode(sel.length() - 1))
+            except RuntimeError:
+                fn_node = None
+            for attr in _TARGET_ATTRS:
+                key = f"{target}.{attr}"
+                mplug: Optional[om2.MPlug] = None
+                value: Optional[float] = None
+                if fn_node is not None:
+                    try:
+                        mplug = fn_node.findPlug(attr, False)
+                        value = _plug_value(mplug)
+                    except RuntimeError:
+                        value = None
+                self._mplug_cache[key] = mplug
+                self._plug_cache[key] = value
 
     def _populate_value_inputs(self, source: str, targets: List[str]):
+        self.setUpdatesEnabled(False)
+        try:
+            self._fill_value_inputs(source, targets)
+        finally:
+            self.setUpdatesEnabled(True)
+
+    def _fill_value_inputs(self, source: str, targets: List[str]):
+        self._populate_driver_and_defaults(source, targets)
+        if self.individual_values_group.isChecked():
+            self._populate_individual(targets)
+        else:
+            self._individual_built_for = None
+        has_targets = bool(targets)
+        self.target_value_group.setEnabled(has_targets)
+        self.individual_values_group.setEnabled(has_targets)
+        self._apply_attribute_visibility()
+
+    def _populate_driver_and_defaults(self, source: str, targets: List[str]):
         driver_attr = self._driver_attribute(source) if source else ""
-        driver_value = 0.0
-        if driver_attr and cmds.objExists(driver_attr):
-            try:
-                driver_value = cmds.getAttr(driver_attr)
-            except Exception:
-                driver_value = 0.0
-            else:
-                if isinstance(driver_value, (list, tuple)):
-                    driver_value = driver_value[0]
-        self.driver_value_spin.setValue(driver_value or 0.0)
-        self.driver_value_spin.setEnabled(bool(driver_attr and cmds.objExists(driver_attr)))
+        driver_value = self._cached_get(driver_attr) if driver_attr else None
+        _set_spin_value(self.driver_value_spin, driver_value or 0.0)
+        self.driver_value_spin.setEnabled(
+            bool(driver_attr and self._find_plug(driver_attr) is not None)
+        )
+
+        # The first target normally carries every TRS plug, so only it is
+        # prefetched; later targets are read lazily when it does not.
+        self._prefetch_plug_values(targets[:1])
 
         for attr, spin in self.target_value_inputs.items():
             value = 0.0
             for target in targets:
-                plug = f"{target}.{attr}"
-                if cmds.objExists(plug):
-                    try:
-                        value = cmds.getAttr(plug)
-                    except Exception:
-                        value = 0.0
-                    else:
-                        if isinstance(value, (list, tuple)):
-                            value = value[0]
-                        break
-            spin.setValue(value or 0.0)
+                cached = self._cached_get(f"{target}.{attr}")
+                if cached is not None:
+                    value = cached
+                    break
+            _set_spin_value(spin, value or 0.0)
             spin.setEnabled(bool(targets))
 
-        self._clear_layout(self.individual_values_layout)
-        self.individual_value_inputs = {}
-        self.individual_value_labels = {}
-        for target in targets:
-            group_box = QtWidgets.QGroupBox(_short_name(target))
-            grid = QtWidgets.QGridLayout(group_box)
-            attr_widgets: Dict[str, QtWidgets.QDoubleSpinBox] = {}
-            attr_labels: Dict[str, QtWidgets.QLabel] = {}
-            for row, attr in enumerate(self._target_attr_list):
-                plug = f"{target}.{attr}"
-                value = 0.0
-                if cmds.objExists(plug):
-                    try:
-                        value = cmds.getAttr(plug)
-                    except Exception:
-                        value = 0.0
-                    else:
-                        if isinstance(value, (list, tuple)):
-                            value = value[0]
-                label = QtWidgets.QLabel(attr)
-                spin = QtWidgets.QDoubleSpinBox()
-                spin.setDecimals(4)
-                spin.setRange(-1_000_000.0, 1_000_000.0)
-                spin.setValue(value or 0.0)
-                grid.addWidget(label, row, 0)
-                grid.addWidget(spin, row, 1)
-                attr_widgets[attr] = spin
-                attr_labels[attr] = label
-            self.individual_values_layout.addWidget(group_box)
-            self.individual_value_inputs[target] = attr_widgets
-            self.individual_value_labels[target] = attr_labels
-        self.individual_values_layout.addStretch(1)
-        has_targets = bool(targets)
-        self.target_value_group.setEnabled(has_targets)
-        self.individual_values_group.setEnabled(has_targets)
-        self._apply_attribute_visibility()
+    def _populate_individual(self, targets: List[str]):
+        self._ensure_individual_view()
+        self._prefetch_plug_values(targets)
+        self._values_model.set_targets(
+            targets,
+            [
+                self._cached_get(f"{target}.{attr}") or 0.0
+                for target in targets
+                for attr in _TARGET_ATTRS
+            ],
+        )
+        self._individual_built_for = tuple(targets)
 
     def _apply_attribute_visibility(self):
-        selected_attrs = set(self._selected_target_attributes())
+        selected_attrs = frozenset(self._selected_attrs)
         for attr, label in self.target_value_labels.items():
             visible = attr in selected_attrs
             label.setVisible(visible)
             spin = self.target_value_inputs.get(attr)
             if spin is not None:
                 spin.setVisible(visible)
-        for target, attr_inputs in self.individual_value_inputs.items():
-            labels = self.individual_value_labels.get(target, {})
-            for attr, spin in attr_inputs.items():
-                visible = attr in selected_attrs
-                spin.setVisible(visible)
-                label = labels.get(attr)
-                if label is not None:
-                    label.setVisible(visible)
+        if self.individual_values_view is not None:
+            for column, attr in enumerate(_TARGET_ATTRS):
+                self.individual_values_view.setColumnHidden(column, attr not in selected_attrs)
 
     def _update_attribute_visibility(self):
+        self._selected_attrs = tuple(
+            attr for attr, checkbox in self._attr_checkboxes if checkbox.isChecked()
+        )
         self._apply_attribute_visibility()
 
-    def _target_value_for(self, target: str, attr: str) -> Optional[float]:
-        if self.individual_values_group.isChecked():
-            target_inputs = self.individual_value_inputs.get(target, {})
-            widget = target_inputs.get(attr)
-            if widget is not None:
-                return widget.value()
-        widget = self.target_value_inputs.get(attr)
-        if widget is not None:
-            return widget.value()
-        return None
+    def _on_individual_values_toggled(self, checked: bool):
+        self._invalidate_plug_cache()
+        if checked and self._individual_built_for != tuple(self._target_items):
+            self._populate_individual(self._target_items)
+            self._apply_attribute_visibility()
 
     def _refresh_value_fields(self):
+        self._invalidate_plug_cache()
         if not self._current_source:
             self._populate_value_inputs("", [])
             return
         self._populate_value_inputs(self._current_source, self._target_items)
 
     def _set_driven_key(self):
+        # The scene may have been posed since the fields were filled, so the
+        # values restored after keying must be read now, not from the cache.
+        self._invalidate_plug_cache()
         source = self._active_source_joint()
         if not source:
             return
@@ -460,87 +700,82 @@ class DrivenKeyToolDialog(QtWidgets.QDialog):
             return
 
         driver_attr = self._driver_attribute(source)
-        if not cmds.objExists(driver_attr):
+        driver_plug = self._find_plug(driver_attr)
+        if driver_plug is None:
             cmds.warning(u"ソースジョイントに選択された軸が存在しません。")
             return
 
         driver_value = self.driver_value_spin.value()
         original_driver_value: Optional[float] = None
         try:
-            original_driver_value = cmds.getAttr(driver_attr)
-        except Exception:
+            original_driver_value = _plug_value(driver_plug)
+        except RuntimeError:
             original_driver_value = None
         target_original_values: Dict[str, Optional[float]] = {}
 
-        previous_selection = cmds.ls(sl=True)
-
-        cmds.undoInfo(openChunk=True)
+        cmds.undoInfo(openChunk=True, chunkName="DrivenKeyTool_SetDrivenKey")
         try:
+            if driver_plug.isLocked:
+                try:
+                    cmds.setAttr(driver_attr, lock=False)
+                except Exception:
+                    pass
             try:
-                cmds.select(source, r=True)
-            except Exception:
-                pass
-
-            try:
-                cmds.setAttr(driver_attr, lock=False)
-            except Exception:
-                pass
-            try:
-                cmds.setAttr(driver_attr, driver_value)
-            except Exception:
+                _set_plug_value(driver_plug, driver_value)
+            except RuntimeError:
                 pass
 
-            for target in targets:
-                for attr in attrs:
-                    plug = f"{target}.{attr}"
-                    if not cmds.objExists(plug):
-                        continue
+            use_individual = self.individual_values_group.isChecked()
+            default_values = {attr: self.target_value_inputs[attr].value() for attr in attrs}
+            # Every target list is built from full paths, so the plugs compare
+            # directly against ls -long.
+            candidates = [(target, attr) for target in targets for attr in attrs]
+            existing = set(
+                cmds.ls([f"{target}.{attr}" for target, attr in candidates], long=True) or []
+            )
+            driven_plugs: List[str] = []
+            for target, attr in candidates:
+                plug = f"{target}.{attr}"
+                if plug not in existing:
+                    continue
+                mplug = self._find_plug(plug)
+                if mplug is None or mplug.isLocked or not mplug.isKeyable:
                     try:
                         cmds.setAttr(plug, lock=False, keyable=True, channelBox=True)
                     except Exception:
                         pass
-                    try:
-                        if plug not in target_original_values:
-                            target_original_values[plug] = cmds.getAttr(plug)
-                    except Exception:
-                        if plug not in target_original_values:
-                            target_original_values[plug] = None
-                    value = self._target_value_for(target, attr)
-                    if value is not None:
+                if plug not in target_original_values:
+                    original_value: Optional[float] = None
+                    if mplug is not None:
                         try:
-                            cmds.setAttr(plug, value)
-                        except Exception:
-                            pass
-                    cmds.setDrivenKeyframe(plug, cd=driver_attr)
+                            original_value = _plug_value(mplug)
+                        except RuntimeError:
+                            original_value = None
+                    target_original_values[plug] = original_value
+                value = self._values_model.value(target, attr) if use_individual else None
+                if value is None:
+                    value = default_values.get(attr)
+                if value is not None and mplug is not None:
+                    try:
+                        _set_plug_value(mplug, value)
+                    except RuntimeError:
+                        pass
+                driven_plugs.append(plug)
+            if driven_plugs:
+                cmds.setDrivenKeyframe(driven_plugs, cd=driver_attr)
         finally:
-
             if original_driver_value is not None:
-                restored_driver = (
-                    original_driver_value[0]
-                    if isinstance(original_driver_value, (list, tuple))
-                    else original_driver_value
-                )
                 try:
-                    cmds.setAttr(driver_attr, restored_driver)
-                except Exception:
+                    _set_plug_value(driver_plug, original_driver_value)
+                except RuntimeError:
                     pass
             for plug, value in target_original_values.items():
-                if value is None:
+                mplug = self._find_plug(plug)
+                if value is None or mplug is None:
                     continue
-                restored = value[0] if isinstance(value, (list, tuple)) else value
-                try:
-                    cmds.setAttr(plug, restored)
-                except Exception:
-                    pass
-            if previous_selection:
                 try:
-                    cmds.select(previous_selection, r=True)
-                except Exception:
-                    pass
-            else:
-                try:
-                    cmds.select(clear=True)
-                except Exception:
+                    _set_plug_value(mplug, value)
+                except RuntimeError:
                     pass
             cmds.undoInfo(closeChunk=True)
 
@@ -560,17 +795,12 @@ class DrivenKeyToolDialog(QtWidgets.QDialog):
             return
 
         anim_curves: List[str] = []
-        for target in targets:
-            for attr in attrs:
-                plug = f"{target}.{attr}"
-                for curve_type in ANIM_CURVE_TYPES:
-                    conns = (
-                        cmds.listConnections(plug, type=curve_type, s=True, d=False)
-                        or []
-                    )
-                    for curve in conns:
-                        if curve not in anim_curves:
-                            anim_curves.append(curve)
+        plugs = cmds.ls([f"{target}.{attr}" for target in targets for attr in attrs]) or []
+        if plugs:
+            conns = cmds.listConnections(plugs, type="animCurve", s=True, d=False) or []
+            if conns:
+                driven_curves = set(cmds.ls(conns, type=list(ANIM_CURVE_TYPES)) or [])
+                anim_curves = [c for c in _unique(conns) if c in driven_curves]
 
         if not anim_curves:
             cmds.warning(u"関連するアニメーションカーブが見つかりません。")
@@ -581,7 +811,7 @@ class DrivenKeyToolDialog(QtWidgets.QDialog):
 
     def _on_mode_changed(self):
         mode = self.mode_combo.currentData()
-        self.manual_group.setVisible(mode == self.MODE_MANUAL)
+        self._set_manual_visible(mode == self.MODE_MANUAL)
         if mode != self.MODE_MANUAL:
             self.targets_list.setEnabled(True)
         self._update_targets()
@@ -601,23 +831,21 @@ class DrivenKeyToolDialog(QtWidgets.QDialog):
             self._set_manual_targets_from_selection()
 
     def _set_manual_source_from_selection(self):
-        sel = cmds.ls(sl=True, type="joint") or []
+        sel = cmds.ls(sl=True, type="joint", long=True) or []
         if not sel:
             cmds.warning(u"ジョイントを選択してください。")
             return
-        source = cmds.ls(sel[0], l=True) or [sel[0]]
-        self._manual_source = source[0]
+        self._manual_source = sel[0]
         self._current_source = self._manual_source
         self._update_manual_display()
         self._apply_manual_selection()
 
     def _set_manual_targets_from_selection(self):
-        sel = cmds.ls(sl=True, type="joint") or []
-        if not sel:
+        long_names = cmds.ls(sl=True, type="joint", long=True) or []
+        if not long_names:
             cmds.warning(u"ターゲットとなるジョイントを選択してください。")
             return
-        long_names = [cmds.ls(j, l=True)[0] if cmds.ls(j, l=True) else j for j in sel]
-        self._manual_targets = list(dict.fromkeys(long_names))
+        self._manual_targets = _unique(long_names)
         self._apply_manual_selection()
 
     def _fetch_targets_from_source(self):
@@ -628,28 +856,21 @@ class DrivenKeyToolDialog(QtWidgets.QDialog):
         if not cmds.objExists(driver_attr):
             cmds.warning(u"ソースの回転属性が存在しません。")
             return
+        targets: List[str] = []
+        conns = cmds.listConnections(driver_attr, type="animCurve", s=False, d=True) or []
         curves: List[str] = []
-        for curve_type in ANIM_CURVE_TYPES:
-            conns = (
-                cmds.listConnections(driver_attr, type=curve_type, s=False, d=True)
+        if conns:
+            curves = cmds.ls(_unique(conns), type=list(ANIM_CURVE_TYPES)) or []
+        if curves:
+            outputs = (
+                cmds.listConnections(
+                    [f"{curve}.output" for curve in curves], plugs=True, s=False, d=True
+                )
                 or []
             )
-            for curve in conns:
-                if curve not in curves:
-                    curves.append(curve)
-        targets: List[str] = []
-        for curve in curves:
-            outputs = cmds.listConnections(f"{curve}.output", plugs=True, s=False, d=True) or []
-            for plug in outputs:
-                if "." not in plug:
-                    continue
-                node, _ = plug.split(".", 1)
-                if cmds.nodeType(node) != "joint":
-                    continue
-                long_name = cmds.ls(node, l=True) or [node]
-                target = long_name[0]
-                if target not in targets:
-                    targets.append(target)
+            nodes = _unique([plug.split(".", 1)[0] for plug in outputs if "." in plug])
+            if nodes:
+                targets = _unique(cmds.ls(nodes, type="joint", long=True) or [])
         if not targets:
             cmds.warning(u"接続されたターゲットが見つかりません。")
             return
@@ -657,13 +878,12 @@ class DrivenKeyToolDialog(QtWidgets.QDialog):
         self._apply_manual_selection()
 
     def _fetch_source_from_targets(self):
-        sel = cmds.ls(sl=True, type="joint") or []
+        sel = cmds.ls(sl=True, type="joint", long=True) or []
         if not sel:
             cmds.warning(u"ターゲットとなるジョイントを選択してください。")
             return
         for j in sel:
-            long_name = cmds.ls(j, l=True) or [j]
-            driver = self._find_driver_for_target(long_name[0])
+            driver = self._find_driver_for_target(j)
             if driver:
                 self._manual_source = driver
                 self._current_source = driver
@@ -673,31 +893,41 @@ class DrivenKeyToolDialog(QtWidgets.QDialog):
         cmds.warning(u"接続されたソースが見つかりませんでした。")
 
     def _find_driver_for_target(self, target: str) -> str:
-        for attr in self._target_attr_list:
-            plug = f"{target}.{attr}"
-            if not cmds.objExists(plug):
+        pairs = (
+            cmds.listConnections(
+                target, type="animCurve", s=True, d=False, connections=True, plugs=True
+            )
+            or []
+        )
+        curves_by_attr: List[Tuple[int, str]] = []
+        for dst_plug, src_plug in zip(pairs[::2], pairs[1::2]):
+            attr = dst_plug.split(".", 1)[-1]
+            if attr in _TARGET_ATTR_INDEX:
+                curves_by_attr.append((_TARGET_ATTR_INDEX[attr], src_plug.split(".", 1)[0]))
+        if not curves_by_attr:
+            return ""
+        driven_curves = set(
+            cmds.ls([curve for _, curve in curves_by_attr], type=list(ANIM_CURVE_TYPES)) or []
+        )
+        node_types: Dict[str, str] = {}
+        for _, curve in sorted(curves_by_attr, key=lambda item: item[0]):
+            if curve not in driven_curves:
                 continue
-            curves: List[str] = []
-            for curve_type in ANIM_CURVE_TYPES:
-                conns = (
-                    cmds.listConnections(plug, type=curve_type, s=True, d=False) or []
-                )
-                for curve in conns:
-                    if curve not in curves:
-                        curves.append(curve)
-            for curve in curves:
-                inputs = cmds.listConnections(curve, plugs=True, s=True, d=False) or []
-                for input_plug in inputs:
-                    if "." not in input_plug:
-                        continue
-                    node, _ = input_plug.split(".", 1)
-                    if cmds.nodeType(node) != "joint":
-                        continue
-                    long_name = cmds.ls(node, l=True) or [node]
-                    return long_name[0]
+            inputs = cmds.listConnections(curve, plugs=True, s=True, d=False) or []
+            for input_plug in inputs:
+                if "." not in input_plug:
+                    continue
+                node, _ = input_plug.split(".", 1)
+                if node not in node_types:
+                    node_types[node] = cmds.nodeType(node)
+                if node_types[node] != "joint":
+                    continue
+                long_name = cmds.ls(node, l=True) or [node]
+                return long_name[0]
         return ""
 
     def _update_manual_display(self):
+        self._ensure_manual_group()
         self.manual_source_display.setText(_short_name(self._manual_source) if self._manual_source else "")
         if self._manual_targets:
             names = ", ".join(_short_name(t) for t in self._manual_targets)
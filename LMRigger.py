@@ -3,12 +3,13 @@ from PySide2 import QtCore
 from PySide2 import QtGui
 from PySide2 import QtWidgets
 from PySide2.QtWidgets import QFrame
-from PySide2.QtWidgets import QRadioButton
 from shiboken2 import wrapInstance
+from contextlib import contextmanager
 from functools import partial
 import math
 
 import maya.OpenMayaUI as omui
+import maya.api.OpenMaya as om2
 import maya.cmds as cmds
 
 def maya_main_window():
@@ -18,6 +19,105 @@ def maya_main_window():
     main_window_ptr = omui.MQtUtil.mainWindow()
     return wrapInstance(int(main_window_ptr), QtWidgets.QWidget)
 
+AXIS_VECTORS = {
+    ("X", 1): (1, 0, 0), ("X", -1): (-1, 0, 0),
+    ("Y", 1): (0, 1, 0), ("Y", -1): (0, -1, 0),
+    ("Z", 1): (0, 0, 1), ("Z", -1): (0, 0, -1),
+}
+
+# Unit-size control shape points, scaled by the control size when a curve is built
+CONTROL_SHAPE_POINTS = {
+    "Cube": (
+        (-1, 1, 1), (1, 1, 1), (1, 1, -1), (-1, 1, -1),
+        (-1, 1, 1), (-1, -1, 1), (-1, -1, -1), (1, -1, -1),
+        (1, -1, 1), (-1, -1, 1), (1, -1, 1), (1, 1, 1),
+        (1, 1, -1), (1, -1, -1), (-1, -1, -1), (-1, 1, -1)),
+    "Square": (
+        (-1, 0, -1), (-1, 0, 1), (1, 0, 1), (1, 0, -1), (-1, 0, -1)),
+    "Triangle": (
+        (1, 0, -1), (0, 0, 1), (-1, 0, -1), (1, 0, -1)),
+    "Cross": (
+        (-1, 0, -2), (1, 0, -2), (1, 0, -1), (2, 0, -1),
+        (2, 0, 1), (1, 0, 1), (1, 0, 2), (-1, 0, 2),
+        (-1, 0, 1), (-2, 0, 1), (-2, 0, -1), (-1, 0, -1),
+        (-1, 0, -2)),
+    "Arrow": (
+        (0, 0, 2), (-1.6, 0, 0.4), (-0.8, 0, 0.4), (-0.8, 0, -2),
+        (0.8, 0, -2), (0.8, 0, 0.4), (1.6, 0, 0.4), (0, 0, 2)),
+    "Four Arrows": (
+        (0, 0, -2), (0.8, 0, -1.2), (0.4, 0, -1.2), (0.4, 0, -0.4),
+        (1.2, 0, -0.4), (1.2, 0, -0.8), (2, 0, 0), (1.2, 0, 0.8),
+        (1.2, 0, 0.4), (0.4, 0, 0.4), (0.4, 0, 1.2), (0.8, 0, 1.2),
+        (0, 0, 2), (-0.8, 0, 1.2), (-0.4, 0, 1.2), (-0.4, 0, 0.4),
+        (-1.2, 0, 0.4), (-1.2, 0, 0.8), (-2, 0, 0), (-1.2, 0, -0.8),
+        (-1.2, 0, -0.4), (-0.4, 0, -0.4), (-0.4, 0, -1.2), (-0.8, 0, -1.2),
+        (0, 0, -2)),
+}
+
+@contextmanager
+def lmrigger_fast_tool():
+    """
+    Collapse the wrapped edits into one undo step with viewport refresh,
+    parallel evaluation, auto keying and cycle checking switched off, then
+    put every setting back the way it was
+    """
+    refresh_suspended = cmds.refresh(query=True, suspend=True)
+    eval_mode = cmds.evaluationManager(query=True, mode=True)[0]
+    auto_key = cmds.autoKeyframe(query=True, state=True)
+    cycle_check = cmds.cycleCheck(query=True, evaluation=True)
+
+    cmds.undoInfo(openChunk=True, chunkName="LMrigger")
+    cmds.refresh(suspend=True)
+    cmds.evaluationManager(mode="off")
+    cmds.autoKeyframe(state=False)
+    cmds.cycleCheck(evaluation=False)
+    try:
+        yield
+    finally:
+        cmds.cycleCheck(evaluation=cycle_check)
+        cmds.autoKeyframe(state=auto_key)
+        cmds.evaluationManager(mode=eval_mode)
+        cmds.refresh(suspend=refresh_suspended)
+        cmds.undoInfo(closeChunk=True)
+
+def flip_joint_orient(joint, axis):
+    """
+    Turn a joint's orientation 180 degrees around one of its local axes,
+    baking rotate into jointOrient and keeping its child joints in place
+    """
+    flip = om2.MQuaternion(math.pi, om2.MVector(axis))
+    rotate = om2.MEulerRotation([math.radians(v) for v in cmds.getAttr(joint + ".rotate")[0]],
+                                cmds.getAttr(joint + ".rotateOrder"))
+    orient = om2.MEulerRotation([math.radians(v) for v in cmds.getAttr(joint + ".jointOrient")[0]])
+    new_orient = (flip * rotate.asQuaternion() * orient.asQuaternion()).asEulerRotation()
+    cmds.setAttr(joint + ".rotate", 0, 0, 0)
+    cmds.setAttr(joint + ".jointOrient", *[math.degrees(v) for v in (new_orient.x, new_orient.y, new_orient.z)])
+
+    # A half turn is its own inverse, so the same quaternion maps the children back
+    for child in cmds.listRelatives(joint, children=True, type="joint", fullPath=True) or []:
+        translate = om2.MVector(cmds.getAttr(child + ".translate")[0]).rotateBy(flip)
+        child_orient = om2.MEulerRotation(
+            [math.radians(v) for v in cmds.getAttr(child + ".jointOrient")[0]])
+        new_child_orient = (child_orient.asQuaternion() * flip).asEulerRotation()
+        cmds.setAttr(child + ".translate", translate.x, translate.y, translate.z)
+        cmds.setAttr(child + ".jointOrient",
+                     *[math.degrees(v) for v in (new_child_orient.x, new_child_orient.y, new_child_orient.z)])
+
+def selected_joints_with_children():
+    """
+    Return (full path, first child full path or None) for each selected joint
+    """
+    result = []
+    iterator = om2.MItSelectionList(om2.MGlobal.getActiveSelectionList(), om2.MFn.kJoint)
+    while not iterator.isDone():
+        dag_path = iterator.getDagPath()
+        first_child = None
+        if dag_path.childCount() > 0:
+            first_child = om2.MDagPath.getAPathTo(dag_path.child(0)).fullPathName()
+        result.append((dag_path.fullPathName(), first_child))
+        iterator.next()
+    return result
+
 class LMriggerDialog(QtWidgets.QDialog):
 
     dlg_instance = None
@@ -33,11 +133,17 @@ class LMriggerDialog(QtWidgets.QDialog):
             cls.dlg_instance.raise_()
             cls.dlg_instance.activateWindow()
 
-    def __init__(self, parent=maya_main_window()):
-        super(LMriggerDialog, self).__init__(parent)
+    def __init__(self, parent=None):
+        super(LMriggerDialog, self).__init__(parent or maya_main_window())
         
         self.setWindowTitle("LMrigger 2.7.23")
+        self.setObjectName("LMriggerDialog")
         # self.setFixedWidth(250)
+
+        self.primary_axis_char = "X"
+        self.secondary_axis_char = "Y"
+        self.selection_cache = {}
+        self.selection_jobs = []
                
         self.create_widgets()
         self.create_layouts()
@@ -63,35 +169,15 @@ class LMriggerDialog(QtWidgets.QDialog):
         self.show_axis_btn = QtWidgets.QPushButton("Show Axis")
         self.hide_axis_btn = QtWidgets.QPushButton("Hide Axis")
 
-        self.groupBox_A = QtWidgets.QGroupBox()
-        self.primary_axis_label = QtWidgets.QLabel("Primary Axis:     ")
-        self.primary_axis_x_rb = QtWidgets.QRadioButton("X")
-        self.primary_axis_x_rb.setChecked(True)
-        self.primary_axis_y_rb = QtWidgets.QRadioButton("Y")
-        self.primary_axis_z_rb = QtWidgets.QRadioButton("Z")
-        self.primary_axis_cbox = QtWidgets.QComboBox()
-        self.primary_axis_cbox.addItem("+")
-        self.primary_axis_cbox.addItem("-")
-
-        self.groupBox_B = QtWidgets.QGroupBox()
-        self.secondary_axis_label = QtWidgets.QLabel("Secondary Axis:")
-        self.secondary_axis_x_rb = QtWidgets.QRadioButton("X")
-        self.secondary_axis_y_rb = QtWidgets.QRadioButton("Y")
-        self.secondary_axis_y_rb.setChecked(True)
-        self.secondary_axis_z_rb = QtWidgets.QRadioButton("Z")
-        self.secondary_axis_cbox = QtWidgets.QComboBox()
-        self.secondary_axis_cbox.addItem("+")
-        self.secondary_axis_cbox.addItem("-")
-        
-        self.groupBox_C = QtWidgets.QGroupBox()
-        self.world_up_axis_label = QtWidgets.QLabel("World Up Axis:  ")
-        self.world_up_axis_x_rb = QtWidgets.QRadioButton("X")
-        self.world_up_axis_y_rb = QtWidgets.QRadioButton("Y")
-        self.world_up_axis_y_rb.setChecked(True)
-        self.world_up_axis_z_rb = QtWidgets.QRadioButton("Z")
-        self.world_up_axis_cbox = QtWidgets.QComboBox()
-        self.world_up_axis_cbox.addItem("+")
-        self.world_up_axis_cbox.addItem("-")
+        (self.groupBox_A, self.primary_axis_label, self.primary_axis_x_rb,
+         self.primary_axis_y_rb, self.primary_axis_z_rb,
+         self.primary_axis_cbox) = self.create_axis_group("Primary Axis:     ", "X")
+        (self.groupBox_B, self.secondary_axis_label, self.secondary_axis_x_rb,
+         self.secondary_axis_y_rb, self.secondary_axis_z_rb,
+         self.secondary_axis_cbox) = self.create_axis_group("Secondary Axis:", "Y")
+        (self.groupBox_C, self.world_up_axis_label, self.world_up_axis_x_rb,
+         self.world_up_axis_y_rb, self.world_up_axis_z_rb,
+         self.world_up_axis_cbox) = self.create_axis_group("World Up Axis:  ", "Y")
 
         self.orient_to_world_btn = QtWidgets.QPushButton("Orient To World")
         self.orient_to_world_btn.setMaximumWidth(130)
@@ -99,18 +185,8 @@ class LMriggerDialog(QtWidgets.QDialog):
         self.orient_joint_btn.setMinimumHeight(50)
 
         self.tweak_axis_label = QtWidgets.QLabel("Tweak:")
-        self.tweak_axis_x_sb = QtWidgets.QDoubleSpinBox()
-        self.tweak_axis_x_sb.setMinimum(-360.0)
-        self.tweak_axis_x_sb.setMaximum(360.0)
-        self.tweak_axis_x_sb.setDecimals(1)
-        self.tweak_axis_y_sb = QtWidgets.QDoubleSpinBox()
-        self.tweak_axis_y_sb.setMinimum(-360.0)
-        self.tweak_axis_y_sb.setMaximum(360.0)
-        self.tweak_axis_y_sb.setDecimals(1)
-        self.tweak_axis_z_sb = QtWidgets.QDoubleSpinBox()
-        self.tweak_axis_z_sb.setMinimum(-360.0)
-        self.tweak_axis_z_sb.setMaximum(360.0)
-        self.tweak_axis_z_sb.setDecimals(1)
+        self.tweak_axis_x_sb, self.tweak_axis_y_sb, self.tweak_axis_z_sb = [
+            self.create_tweak_spinbox() for _ in range(3)]
         self.tweak_axis_zero_btn = QtWidgets.QPushButton("Zero")
         
         self.tweak_axis_plus_btn = QtWidgets.QPushButton("Manual + Rotation")
@@ -118,9 +194,6 @@ class LMriggerDialog(QtWidgets.QDialog):
         
         self.groupBox_1 = QtWidgets.QGroupBox()
         self.control_shape_label = QtWidgets.QLabel("Control Shape:")
-        self.control_shape_rb_circle = QtWidgets.QRadioButton("Circle")
-        self.control_shape_rb_circle.setChecked(True)
-        self.control_shape_rb_cube = QtWidgets.QRadioButton("Cube")
         self.control_shape_cbox = QtWidgets.QComboBox()
         self.control_shape_cbox.addItem("Circle")
         self.control_shape_cbox.addItem("Cube")
@@ -143,7 +216,6 @@ class LMriggerDialog(QtWidgets.QDialog):
         self.scale_constraint_rb_yes.setChecked(True)
         self.scale_constraint_rb_no = QtWidgets.QRadioButton("No")
 
-        self.groupBox_4 = QtWidgets.QGroupBox()
         self.control_shape_size_label = QtWidgets.QLabel("Shape Size:")
         self.control_shape_size_sb = QtWidgets.QDoubleSpinBox()
         self.control_shape_size_sb.setMinimum(0.001)
@@ -154,7 +226,6 @@ class LMriggerDialog(QtWidgets.QDialog):
         self.suffix_right_label = QtWidgets.QLabel("Right Controls Suffix:")
         self.suffix_right_text = QtWidgets.QLineEdit("_R")
 
-        self.color_picker = QtWidgets.QColorDialog()
         self.left_color_btn = QtWidgets.QPushButton("Left")
         self.left_color_btn.setStyleSheet('background-color: rgb(139,12,12)')
         self.middle_color_btn = QtWidgets.QPushButton("Middle")
@@ -175,42 +246,40 @@ class LMriggerDialog(QtWidgets.QDialog):
         self.separator2 = QFrame()
         self.separator2.setFrameShape(QFrame.HLine)
         self.separator2.setLineWidth(3)
-        self.separator3 = QFrame()
-        self.separator3.setFrameShape(QFrame.VLine)
-        self.separator3.setLineWidth(3)
     
+    def create_axis_group(self, label_text, checked_axis):
+        """Builds a labelled X/Y/Z radio row with a +/- sign combo box."""
+        group_box = QtWidgets.QGroupBox()
+        label = QtWidgets.QLabel(label_text)
+        axis_buttons = []
+        for axis in "XYZ":
+            button = QtWidgets.QRadioButton(axis)
+            button.setChecked(axis == checked_axis)
+            axis_buttons.append(button)
+        sign_cbox = QtWidgets.QComboBox()
+        sign_cbox.addItems(["+", "-"])
+
+        layout = QtWidgets.QHBoxLayout()
+        layout.addWidget(label)
+        for button in axis_buttons:
+            layout.addWidget(button)
+        layout.addWidget(sign_cbox)
+        layout.setContentsMargins(5,0,5,0)
+        group_box.setLayout(layout)
+        return (group_box, label) + tuple(axis_buttons) + (sign_cbox,)
+
+    def create_tweak_spinbox(self):
+        spinbox = QtWidgets.QDoubleSpinBox()
+        spinbox.setMinimum(-360.0)
+        spinbox.setMaximum(360.0)
+        spinbox.setDecimals(1)
+        return spinbox
+
     def create_layouts(self):
         axis_layout = QtWidgets.QHBoxLayout()
         axis_layout.addWidget(self.show_axis_btn)
         axis_layout.addWidget(self.hide_axis_btn)
 
-        primary_axis_layout = QtWidgets.QHBoxLayout()
-        primary_axis_layout.addWidget(self.primary_axis_label)
-        primary_axis_layout.addWidget(self.primary_axis_x_rb)
-        primary_axis_layout.addWidget(self.primary_axis_y_rb)
-        primary_axis_layout.addWidget(self.primary_axis_z_rb)
-        primary_axis_layout.addWidget(self.primary_axis_cbox)
-        primary_axis_layout.setContentsMargins(5,0,5,0)
-        self.groupBox_A.setLayout(primary_axis_layout)
-
-        secondary_axis_layout = QtWidgets.QHBoxLayout()
-        secondary_axis_layout.addWidget(self.secondary_axis_label)
-        secondary_axis_layout.addWidget(self.secondary_axis_x_rb)
-        secondary_axis_layout.addWidget(self.secondary_axis_y_rb)
-        secondary_axis_layout.addWidget(self.secondary_axis_z_rb)
-        secondary_axis_layout.addWidget(self.secondary_axis_cbox)
-        secondary_axis_layout.setContentsMargins(5,0,5,0)
-        self.groupBox_B.setLayout(secondary_axis_layout)
-        
-        world_up_axis_layout = QtWidgets.QHBoxLayout()
-        world_up_axis_layout.addWidget(self.world_up_axis_label)
-        world_up_axis_layout.addWidget(self.world_up_axis_x_rb)
-        world_up_axis_layout.addWidget(self.world_up_axis_y_rb)
-        world_up_axis_layout.addWidget(self.world_up_axis_z_rb)
-        world_up_axis_layout.addWidget(self.world_up_axis_cbox)
-        world_up_axis_layout.setContentsMargins(5,0,5,0)
-        self.groupBox_C.setLayout(world_up_axis_layout)
-        
         orient_joints_layout = QtWidgets.QHBoxLayout()
         orient_joints_layout.addWidget(self.orient_to_world_btn)
         orient_joints_layout.addWidget(self.orient_joint_btn)
@@ -288,6 +357,11 @@ class LMriggerDialog(QtWidgets.QDialog):
     def create_connections(self):
         self.show_axis_btn.clicked.connect(self.show_axis)
         self.hide_axis_btn.clicked.connect(self.hide_axis)
+        for attr_name, buttons in (
+                ("primary_axis_char", (self.primary_axis_x_rb, self.primary_axis_y_rb, self.primary_axis_z_rb)),
+                ("secondary_axis_char", (self.secondary_axis_x_rb, self.secondary_axis_y_rb, self.secondary_axis_z_rb))):
+            for button in buttons:
+                button.toggled.connect(partial(self.set_axis_char, attr_name, button.text()))
         self.primary_axis_x_rb.toggled.connect(self.update_joint_orientation)
         self.primary_axis_y_rb.toggled.connect(self.update_joint_orientation)
         self.primary_axis_z_rb.toggled.connect(self.update_joint_orientation)
@@ -306,24 +380,79 @@ class LMriggerDialog(QtWidgets.QDialog):
         self.create_btn.clicked.connect(self.createControls)
         self.control_shape_size_sb.valueChanged.connect(self.updateControlRadius)
         self.about_btn.clicked.connect(self.Gumroad)
-        self.left_color_btn.clicked.connect(self.pick_color_left)
-        self.middle_color_btn.clicked.connect(self.pick_color_middle)
-        self.right_color_btn.clicked.connect(self.pick_color_right)
+        self.left_color_btn.clicked.connect(partial(self.pick_color, self.left_color_btn, "leftControlsColor"))
+        self.middle_color_btn.clicked.connect(partial(self.pick_color, self.middle_color_btn, "restControlsColor"))
+        self.right_color_btn.clicked.connect(partial(self.pick_color, self.right_color_btn, "rightControlsColor"))
         self.change_color_btn.clicked.connect(self.change_control_color)
     
+    @contextmanager
+    def _fast_maya(self):
+        """Run the wrapped edits through lmrigger_fast_tool and drop the cached selection."""
+        try:
+            with lmrigger_fast_tool():
+                yield
+        finally:
+            self.invalidate_selection()
+
+    def selected(self, node_type=None, long=False):
+        """Returns the current selection, cached until Maya reports a change."""
+        key = (node_type, long)
+        if not self.selection_jobs or key not in self.selection_cache:
+            if node_type:
+                nodes = cmds.ls(sl=True, type=node_type, long=long)
+            else:
+                nodes = cmds.ls(sl=True, long=long)
+            if not self.selection_jobs:
+                return nodes
+            self.selection_cache[key] = nodes
+        return list(self.selection_cache[key])
+
+    def invalidate_selection(self):
+        self.selection_cache.clear()
+
+    def showEvent(self, event):
+        super(LMriggerDialog, self).showEvent(event)
+        self.invalidate_selection()
+        if not self.selection_jobs:
+            # parented to the dialog so Maya also drops the jobs if it is destroyed without closeEvent
+            self.selection_jobs = [cmds.scriptJob(event=[event_name, self.invalidate_selection],
+                                                  parent=self.objectName())
+                                   for event_name in ("SelectionChanged", "NameChanged",
+                                                      "Undo", "Redo")]
+
+    def closeEvent(self, event):
+        for job in self.selection_jobs:
+            if cmds.scriptJob(exists=job):
+                cmds.scriptJob(kill=job, force=True)
+        self.selection_jobs = []
+        self.invalidate_selection()
+        super(LMriggerDialog, self).closeEvent(event)
+
     def orient_to_world(self):
-        joints = cmds.ls(sl=True, type="joint")
-        for joint in joints:
-            cmds.joint(joint, edit=True, orientJoint = "none")
+        joints = self.selected("joint")
+        with self._fast_maya():
+            for joint in joints:
+                cmds.joint(joint, edit=True, orientJoint = "none")
 
     def manual_rotation(self, sign):
-        joints = cmds.ls(sl=True, type="joint")
-        cmds.xform(joints, r=True, os=True, 
-                   ra=(self.tweak_axis_x_sb.value()*sign,
-                       self.tweak_axis_y_sb.value()*sign,
-                       self.tweak_axis_z_sb.value()*sign))
-        cmds.joint(joints, edit=True, zso=True)
-        cmds.makeIdentity(joints, apply=True)
+        joints = self.selected("joint", long=True)
+        if not joints:
+            return
+        # makeIdentity already freezes everything below, so only freeze the
+        # topmost selected joint of each chain
+        selected = set(joints)
+        roots = []
+        for joint in joints:
+            parts = joint.split("|")
+            if not any("|".join(parts[:i]) in selected for i in range(2, len(parts))):
+                roots.append(joint)
+        with self._fast_maya():
+            cmds.xform(joints, r=True, os=True, 
+                       ra=(self.tweak_axis_x_sb.value()*sign,
+                           self.tweak_axis_y_sb.value()*sign,
+                           self.tweak_axis_z_sb.value()*sign))
+            cmds.joint(joints, edit=True, zso=True)
+            cmds.makeIdentity(roots, apply=True)
     
     def zero_manual_rotation_spinboxes(self):
         self.tweak_axis_x_sb.setValue(0)
@@ -333,7 +462,7 @@ class LMriggerDialog(QtWidgets.QDialog):
     def update_joint_orientation(self):
         if (self.primary_axis_x_rb.isChecked()):
             if(self.secondary_axis_x_rb.isChecked()):
-                self.secondary_axis_y_rb.setChecked(True)
+                self.check_secondary_axis(self.secondary_axis_y_rb)
                 self.joint_orientation = "xyz"
             elif(self.secondary_axis_y_rb.isChecked()):
                 self.joint_orientation = "xyz"
@@ -343,7 +472,7 @@ class LMriggerDialog(QtWidgets.QDialog):
             if(self.secondary_axis_x_rb.isChecked()):
                 self.joint_orientation = "yxz"
             elif(self.secondary_axis_y_rb.isChecked()):
-                self.secondary_axis_x_rb.setChecked(True)
+                self.check_secondary_axis(self.secondary_axis_x_rb)
                 self.joint_orientation = "yxz"
             elif(self.secondary_axis_z_rb.isChecked()):
                 self.joint_orientation = "yzx"
@@ -353,9 +482,19 @@ class LMriggerDialog(QtWidgets.QDialog):
             elif(self.secondary_axis_y_rb.isChecked()):
                 self.joint_orientation = "zyx"
             elif(self.secondary_axis_z_rb.isChecked()):
-                self.secondary_axis_x_rb.setChecked(True)
+                self.check_secondary_axis(self.secondary_axis_x_rb)
                 self.joint_orientation = "zxy"
 
+    def check_secondary_axis(self, button):
+        """Checks a secondary axis button without re-entering update_joint_orientation."""
+        buttons = (self.secondary_axis_x_rb, self.secondary_axis_y_rb, self.secondary_axis_z_rb)
+        for secondary_button in buttons:
+            secondary_button.blockSignals(True)
+        button.setChecked(True)
+        for secondary_button in buttons:
+            secondary_button.blockSignals(False)
+        self.secondary_axis_char = button.text()
+
     def update_world_up_orientation(self):
         if(self.world_up_axis_cbox.currentText() == "+"):
             if(self.world_up_axis_x_rb.isChecked()):
@@ -380,43 +519,38 @@ class LMriggerDialog(QtWidgets.QDialog):
                         zso=True)
 
     def orient_joints(self):
-        cmds.undoInfo(openChunk=True)
-        pSign = 1
-        sSign = 1
-        if(self.primary_axis_cbox.currentText() == "-"): pSign = -1
-        if(self.secondary_axis_cbox.currentText() == "-"): sSign = -1
-
-        joints = cmds.ls(sl=True, type="joint")
-        for joint in joints:
-            children = cmds.listRelatives(joint, children=True)
-            if(children == None):
-                dummy_child = self.create_end_joint_dummy(joint)
-                if not dummy_child:
-                    return
-                self.orient_j(joint)
-                if cmds.objExists(dummy_child):
-                        cmds.delete(dummy_child)
-            else:
-                self.orient_j(joint)
-        
-        if(pSign == -1 or sSign == -1):
-            for joint in joints:
-                children = cmds.listRelatives(joint, children=True)
-
-                if(children == None):
+        with self._fast_maya():
+            pSign = 1
+            sSign = 1
+            if(self.primary_axis_cbox.currentText() == "-"): pSign = -1
+            if(self.secondary_axis_cbox.currentText() == "-"): sSign = -1
+
+            joint_children = selected_joints_with_children()
+            joints = [joint for joint, _ in joint_children]
+            for joint, child in joint_children:
+                if(child == None):
                     dummy_child = self.create_end_joint_dummy(joint)
-                    if dummy_child:
-                        self.aim_constriant(dummy_child, joint, pSign , sSign)
-                        if cmds.objExists(dummy_child):
+                    if not dummy_child:
+                        return
+                    self.orient_j(joint)
+                    if cmds.objExists(dummy_child):
                             cmds.delete(dummy_child)
                 else:
-                    child = children[0]
-                    cmds.parent(child, world=True)
-                    self.aim_constriant(child, joint, pSign, sSign)
-                    cmds.parent(child, joint)
-                cmds.select(clear=True)
+                    self.orient_j(joint)
+        
+            # orient_j already honours the world up sign ("xdown" etc.), so only
+            # a negative primary/secondary sign needs a 180 degree turn of its frame
+            if(pSign == -1 or sSign == -1):
+                # the signed axes are aimed against the positive world up axis,
+                # which orient_j pointed the other way for a "-" world up
+                wSign = 1
+                if(self.world_up_axis_cbox.currentText() == "-"): wSign = -1
+                flip_axis = self.get_flip_axis(pSign, sSign * wSign)
+                if flip_axis:
+                    for joint in joints:
+                        flip_joint_orient(joint, flip_axis)
+            if joints:
                 cmds.select(joints)
-        cmds.undoInfo(closeChunk=True)
 
     def create_end_joint_dummy(self, joint):
         parent_joint = cmds.listRelatives(joint, parent=True, type="joint")
@@ -449,92 +583,57 @@ class LMriggerDialog(QtWidgets.QDialog):
 
         return dummy
 
-
-    def aim_constriant(self, child, joint, primary_sign, secondary_sign):
-        aimVector, upVector, worldUpVector = self.get_aim_constraint_vectors(primary_sign,
-                                                                            secondary_sign)
-        tempConst = cmds.aimConstraint(child, joint,
-                                        offset=(0,0,0),
-                                        aimVector=aimVector,
-                                        upVector=upVector,
-                                        worldUpVector=worldUpVector,
-                                        worldUpType="vector")
-        cmds.delete(tempConst)
-        cmds.joint(joint,edit=True,zso=True)
-        cmds.makeIdentity(joint, apply=True, t=True, r=True, s=True)
-        
-    def get_aim_constraint_vectors(self, primary_sign, secondary_sign):
-        primary_axis = self.get_checked_radio_button(self.groupBox_A)
-        secondary_axis = self.get_checked_radio_button(self.groupBox_B)
-        world_up_axis = self.get_checked_radio_button(self.groupBox_C)
-
-        if(primary_axis == "X"): aimVector = (primary_sign,0,0)
-        if(primary_axis == "Y"): aimVector = (0,primary_sign,0)
-        if(primary_axis == "Z"): aimVector = (0,0,primary_sign)
-        
-        if(secondary_axis == "X"): upVector = (secondary_sign,0,0)
-        if(secondary_axis == "Y"): upVector = (0,secondary_sign,0)
-        if(secondary_axis == "Z"): upVector = (0,0,secondary_sign)
-
-        if(world_up_axis == "X"): worldUpVector = (1,0,0)
-        if(world_up_axis == "Y"): worldUpVector = (0,1,0)
-        if(world_up_axis == "Z"): worldUpVector = (0,0,1)
-
-        return aimVector, upVector, worldUpVector
-    
-    def get_checked_radio_button(self, group_box):
-        """Gets the checked radio button in a group box."""
-        checked_button = None
-        for button in group_box.findChildren(QRadioButton):
-            if button.isChecked():
-                checked_button = button.text()
-                break
-        return checked_button  
+    def get_flip_axis(self, primary_sign, secondary_sign):
+        """Returns the local axis to turn 180 degrees around to apply the signs, or None."""
+        if primary_sign == 1 and secondary_sign == 1:
+            return None
+        if primary_sign == 1:
+            return AXIS_VECTORS[(self.primary_axis_char, 1)]
+        if secondary_sign == 1:
+            return AXIS_VECTORS[(self.secondary_axis_char, 1)]
+        third_axis = ({"X", "Y", "Z"} - {self.primary_axis_char, self.secondary_axis_char}).pop()
+        return AXIS_VECTORS[(third_axis, 1)]
+
+    def set_axis_char(self, attr_name, axis, checked):
+        """Caches the axis of the radio button that was just checked."""
+        if checked:
+            setattr(self, attr_name, axis)
 
     def show_axis(self):
-        joints = cmds.ls(sl=True)
-        for joint in joints:
-            cmds.toggle(state = True, localAxis = True)
+        joints = self.selected()
+        if joints:
+            cmds.toggle(joints, state = True, localAxis = True)
 
     def hide_axis(self):
-        joints = cmds.ls(sl=True)
-        for joint in joints:
-            cmds.toggle(state = False, localAxis = True)
+        joints = self.selected()
+        if joints:
+            cmds.toggle(joints, state = False, localAxis = True)
 
     def change_control_color(self):
         #check if control is selected
-        controls = cmds.ls(sl=True)
+        controls = self.selected()
         if(len(controls)==0):
             cmds.warning("No controls selected!")
         else:
-            new_color = self.color_picker.getColor()
+            new_color = QtWidgets.QColorDialog.getColor(parent=self)
+            if not new_color.isValid():
+                return
             r, g, b, a = new_color.getRgb()
-            for control in controls:
-                print(control)
-                cmds.setAttr(control + "Shape.overrideEnabled",1)
-                cmds.setAttr(control + "Shape.overrideRGBColors",1)
-                cmds.setAttr(control + "Shape.overrideColorRGB",
-                            r/255,
-                            g/255,
-                            b/255)
-
-    def pick_color_left(self):
-        color = self.color_picker.getColor()
-        r, g, b, a = color.getRgb()
-        self.left_color_btn.setStyleSheet(f'background-color: rgb({r},{g},{b})')
-        self.leftControlsColor = (r,g,b)
-
-    def pick_color_middle(self):
-        color = self.color_picker.getColor()
-        r, g, b, a = color.getRgb()
-        self.middle_color_btn.setStyleSheet(f'background-color: rgb({r},{g},{b})')
-        self.restControlsColor = (r,g,b)
-
-    def pick_color_right(self):
-        color = self.color_picker.getColor()
+            rf, gf, bf = r/255.0, g/255.0, b/255.0
+            with self._fast_maya():
+                for control in controls:
+                    shape = f"{control}Shape"
+                    cmds.setAttr(f"{shape}.overrideEnabled",1)
+                    cmds.setAttr(f"{shape}.overrideRGBColors",1)
+                    cmds.setAttr(f"{shape}.overrideColorRGB", rf, gf, bf, type="double3")
+
+    def pick_color(self, button, attr_name, *args):
+        color = QtWidgets.QColorDialog.getColor(QtGui.QColor(*getattr(self, attr_name)), self)
+        if not color.isValid():
+            return
         r, g, b, a = color.getRgb()
-        self.right_color_btn.setStyleSheet(f'background-color: rgb({r},{g},{b})')
-        self.rightControlsColor = (r,g,b)
+        button.setStyleSheet(f'background-color: rgb({r},{g},{b})')
+        setattr(self, attr_name, (r,g,b))
 
     def updateControlNormal(self):
         if self.control_normal_rb_x.isChecked():
@@ -578,115 +677,33 @@ class LMriggerDialog(QtWidgets.QDialog):
 
 
     def create_shape(self, joint_name):
+        ctrl_name = f"{joint_name}_Ctrl"
         if self.controlShape == "Circle":
             controlCurve = cmds.circle( normal=(self.curveNormalX, 
                                                 self.curveNormalY, 
                                                 self.curveNormalZ), 
                                         radius = self.curveRadius, 
                                                     center=(0, 0, 0), 
-                                                    name = (joint_name + '_Ctrl'))
-
-        elif self.controlShape == "Cube":
-            curve = cmds.curve (d= 1, name = (joint_name + '_Ctrl'),
-            p=[(-self.sz, self.sz, self.sz), (self.sz, self.sz, self.sz),
-            (self.sz, self.sz, -self.sz), (-self.sz, self.sz, -self.sz),
-            (-self.sz, self.sz, self.sz), (-self.sz, -self.sz, self.sz),
-            (-self.sz, -self.sz, -self.sz), (self.sz, -self.sz, -self.sz),
-            (self.sz, -self.sz, self.sz),(-self.sz, -self.sz, self.sz),
-            (self.sz, -self.sz, self.sz), (self.sz, self.sz, self.sz),
-            (self.sz, self.sz, -self.sz), (self.sz, -self.sz, -self.sz),
-            (-self.sz, -self.sz, -self.sz), (-self.sz, self.sz, -self.sz)])
-            controlCurve = self.create_controlCurve(curve) 
-
-        elif self.controlShape == "Square":
-            curve = cmds.curve (d=1, name = (joint_name + '_Ctrl'),
-            p=[ (-self.sz, 0.0, -self.sz),
-                (-self.sz, 0.0, self.sz),
-                (self.sz, 0.0, self.sz),
-                (self.sz, 0.0, -self.sz),
-                (-self.sz, 0.0, -self.sz)])
-            controlCurve = self.create_controlCurve(curve) 
-
-        elif self.controlShape == "Triangle":
-            curve = cmds.curve (d=1, name = (joint_name + '_Ctrl'),
-            p=[ (self.sz, 0.0, -self.sz),
-                (0.0, 0.0, self.sz),
-                (-self.sz, 0.0, -self.sz),
-                (self.sz, 0.0, -self.sz)])
-            controlCurve = self.create_controlCurve(curve) 
-
-        elif self.controlShape == "Cross":
-            curve = cmds.curve (d=1, name = (joint_name + '_Ctrl'),
-            p=[ (-self.sz, 0.0, -2*self.sz),
-                (self.sz, 0.0, -2*self.sz),
-                (self.sz, 0.0, -self.sz),
-                (2*self.sz, 0.0, -self.sz),
-                (2*self.sz, 0.0, self.sz),
-                (self.sz, 0.0, self.sz),
-                (self.sz, 0.0, 2*self.sz),
-                (-self.sz, 0.0, 2*self.sz),
-                (-self.sz, 0.0, self.sz),
-                (-2*self.sz, 0.0, self.sz),
-                (-2*self.sz, 0.0, -self.sz),
-                (-self.sz, 0.0, -self.sz),
-                (-self.sz, 0.0, -2*self.sz)])
-            controlCurve = self.create_controlCurve(curve) 
-
-        elif self.controlShape == "Arrow":
-            curve = cmds.curve (d=1, name = (joint_name + '_Ctrl'),
-            p=[ (0.0, 0.0, 2*self.sz),
-                (-1.6*self.sz, 0.0, 0.4*self.sz),
-                (-0.8*self.sz, 0.0, 0.4*self.sz),
-                (-0.8*self.sz, 0.0, -2*self.sz),
-                (0.8*self.sz, 0.0, -2*self.sz),
-                (0.8*self.sz, 0.0, 0.4*self.sz),
-                (1.6*self.sz, 0.0, 0.4*self.sz),
-                (0.0, 0.0, 2*self.sz)])
-            controlCurve = self.create_controlCurve(curve) 
-
-        elif self.controlShape == "Four Arrows":
-            curve = cmds.curve (d=1, name = (joint_name + '_Ctrl'),
-            p=[ (0.0, 0.0, -2*self.sz),
-                (0.8*self.sz, 0.0, -1.2*self.sz),
-                (0.4*self.sz, 0.0, -1.2*self.sz),
-                (0.4*self.sz, 0.0, -0.4*self.sz),
-                (1.2*self.sz, 0.0, -0.4*self.sz),
-                (1.2*self.sz, 0.0, -0.8*self.sz),
-                (2*self.sz, 0.0, 0.0),
-                (1.2*self.sz, 0.0, 0.8*self.sz),
-                (1.2*self.sz, 0.0, 0.4*self.sz),
-                (0.4*self.sz, 0.0, 0.4*self.sz),
-                (0.4*self.sz, 0.0, 1.2*self.sz),
-                (0.8*self.sz, 0.0, 1.2*self.sz),
-                (0.0, 0.0, 2*self.sz),
-                (-0.8*self.sz, 0.0, 1.2*self.sz),
-                (-0.4*self.sz, 0.0, 1.2*self.sz),
-                (-0.4*self.sz, 0.0, 0.4*self.sz),
-                (-1.2*self.sz, 0.0, 0.4*self.sz),
-                (-1.2*self.sz, 0.0, 0.8*self.sz),
-                (-2*self.sz, 0.0, 0.0),
-                (-1.2*self.sz, 0.0, -0.8*self.sz),
-                (-1.2*self.sz, 0.0, -0.4*self.sz),
-                (-0.4*self.sz, 0.0, -0.4*self.sz),
-                (-0.4*self.sz, 0.0, -1.2*self.sz),
-                (-0.8*self.sz, 0.0, -1.2*self.sz),
-                (0.0, 0.0, -2*self.sz)])
-            controlCurve = self.create_controlCurve(curve) 
+                                                    name = ctrl_name)
+
+        else:
+            points = [(x * self.sz, y * self.sz, z * self.sz)
+                      for x, y, z in CONTROL_SHAPE_POINTS[self.controlShape]]
+            curve = cmds.curve(d=1, name=ctrl_name, p=points)
+            controlCurve = self.create_controlCurve(curve)
 
         return controlCurve
 
     def create_controlCurve(self, curve):
-        curve_cvs = cmds.ls(curve+'.cv[:]', fl=True)
-        cmds.select(curve_cvs)
         cmds.rotate(self.curveNormalZ*90,
                     self.curveNormalY*90,
-                    self.curveNormalX*90, 
+                    self.curveNormalX*90,
+                    f"{curve}.cv[*]",
                     r=True, os=True)
-        cmds.select(curve)
         controlCurve = []
         controlCurve.append(curve)
         curve_shapes = cmds.listRelatives(curve, shapes=True)
-        cmds.rename(curve_shapes[0], curve+"Shape")
+        cmds.rename(curve_shapes[0], f"{curve}Shape")
         return controlCurve
 
     #Creates curve controls in selected joints
@@ -697,67 +714,79 @@ class LMriggerDialog(QtWidgets.QDialog):
         self.updateLeftControlsSuffix()
         self.updateRightControlsSuffix()
 
-        selJoints = cmds.ls(sl=True)
+        with self._fast_maya():
+            selJoints = self.selected()
 
-        if len(selJoints) == 0:
-            cmds.warning( "Nothing Selected" )
-        else:
-            if not cmds.objExists('Controls'):
-                cmds.createDisplayLayer(name='Controls', empty=True)
-            if not cmds.objExists('Joints'):
-                cmds.createDisplayLayer(name='Joints', empty=True)
-
-            constraints_group_name = "Constraints_Grp"
-            if not cmds.objExists(constraints_group_name): 
-                cmds.group(empty = True, 
-                           name = constraints_group_name, 
-                           world = True)
-
-            for i in range (len(selJoints)):
-                controlCurve = self.create_shape(selJoints[i])
-
-                controlGroup = cmds.group( controlCurve , name = (selJoints[i]+'_Grp'))
-                tempConstraint = cmds.parentConstraint(selJoints[i], 
-                                                       controlGroup, w=1, 
-                                                       maintainOffset = False)
-                cmds.delete (tempConstraint[0])
-                pConst = cmds.parentConstraint(controlCurve, selJoints[i], 
-                                               w=1, maintainOffset = False)
-                cmds.parent(pConst, constraints_group_name)
-                if(self.createScaleConstraint == 1):
-                    sConst = cmds.scaleConstraint(controlCurve, selJoints[i])
-                    cmds.parent(sConst, constraints_group_name)
-                #cmds.select (controlCurve)
-
-                cmds.setAttr(controlCurve[0] + "Shape.overrideEnabled",1)
-                cmds.setAttr(controlCurve[0] + "Shape.overrideRGBColors",1)
-                if self.rightControlsSuffix in controlCurve[0]:
-                    cmds.setAttr(controlCurve[0] + "Shape.overrideColorRGB",
-                                 self.rightControlsColor[0]/255,
-                                 self.rightControlsColor[1]/255,
-                                 self.rightControlsColor[2]/255)
-                elif self.leftControlsSuffix in controlCurve[0]:
-                    cmds.setAttr(controlCurve[0] + "Shape.overrideColorRGB",
-                                 self.leftControlsColor[0]/255,
-                                 self.leftControlsColor[1]/255,
-                                 self.leftControlsColor[2]/255)
-                else:
-                    cmds.setAttr(controlCurve[0] + "Shape.overrideColorRGB",
-                                 self.restControlsColor[0]/255,
-                                 self.restControlsColor[1]/255,
-                                 self.restControlsColor[2]/255)
-
-                cmds.editDisplayLayerMembers( 'Joints', selJoints[i], noRecurse=True )
-                if self.controlShape=="Circle":
-                    cmds.editDisplayLayerMembers('Controls', controlCurve[0], noRecurse=True)
-                elif self.controlShape=="Cube":
-                    cmds.editDisplayLayerMembers('Controls', controlCurve, noRecurse=True)
-
-            for i in range (len(selJoints)):
-                jointParent = cmds.listRelatives (selJoints[i], parent=True)
-                if jointParent != None:
-                    if cmds.objExists(jointParent[0]+'_Ctrl'):
-                        cmds.parent(selJoints[i] + '_Grp', jointParent[0] + '_Ctrl')
+            if len(selJoints) == 0:
+                cmds.warning( "Nothing Selected" )
+            else:
+                display_layers = set(cmds.ls(type='displayLayer'))
+                for layer_name in ('Controls', 'Joints'):
+                    if layer_name not in display_layers:
+                        cmds.createDisplayLayer(name=layer_name, empty=True)
+
+                constraints_group_name = "Constraints_Grp"
+                if not cmds.objExists(constraints_group_name): 
+                    cmds.group(empty = True, 
+                               name = constraints_group_name, 
+                               world = True)
+
+                right_rgb = tuple(c/255 for c in self.rightControlsColor)
+                left_rgb = tuple(c/255 for c in self.leftControlsColor)
+                rest_rgb = tuple(c/255 for c in self.restControlsColor)
+                is_circle = self.controlShape == "Circle"
+                is_cube = self.controlShape == "Cube"
+
+                created_ctrls = {}
+                groups = []
+                constraints = []
+                layer_ctrls = []
+                for i in range (len(selJoints)):
+                    controlCurve = self.create_shape(selJoints[i])
+
+                    controlGroup = cmds.group( controlCurve , name = (selJoints[i]+'_Grp'))
+                    created_ctrls[selJoints[i]] = controlCurve[0]
+                    jointParent = cmds.listRelatives (selJoints[i], parent=True)
+                    groups.append((controlGroup, jointParent[0] if jointParent else None))
+                    tempConstraint = cmds.parentConstraint(selJoints[i], 
+                                                           controlGroup, w=1, 
+                                                           maintainOffset = False)
+                    cmds.delete (tempConstraint[0])
+                    pConst = cmds.parentConstraint(controlCurve, selJoints[i], 
+                                                   w=1, maintainOffset = False)
+                    constraints.append(pConst[0])
+                    if(self.createScaleConstraint == 1):
+                        sConst = cmds.scaleConstraint(controlCurve, selJoints[i])
+                        constraints.append(sConst[0])
+                    #cmds.select (controlCurve)
+
+                    shape = f"{controlCurve[0]}Shape"
+                    cmds.setAttr(f"{shape}.overrideEnabled",1)
+                    cmds.setAttr(f"{shape}.overrideRGBColors",1)
+                    if self.rightControlsSuffix in controlCurve[0]:
+                        rgb = right_rgb
+                    elif self.leftControlsSuffix in controlCurve[0]:
+                        rgb = left_rgb
+                    else:
+                        rgb = rest_rgb
+                    cmds.setAttr(f"{shape}.overrideColorRGB", *rgb, type="double3")
+
+                    if is_circle or is_cube:
+                        layer_ctrls.append(controlCurve[0])
+
+                cmds.parent(constraints, constraints_group_name)
+                cmds.editDisplayLayerMembers('Joints', selJoints, noRecurse=True)
+                if layer_ctrls:
+                    cmds.editDisplayLayerMembers('Controls', layer_ctrls, noRecurse=True)
+
+                for controlGroup, jointParent in groups:
+                    if jointParent is None:
+                        continue
+                    parentCtrl = created_ctrls.get(jointParent)
+                    if parentCtrl is None and cmds.objExists(jointParent + '_Ctrl'):
+                        parentCtrl = jointParent + '_Ctrl'
+                    if parentCtrl:
+                        cmds.parent(controlGroup, parentCtrl)
 
 if __name__ == "__main__":   
     try:
@@ -2,28 +2,45 @@
 """Mirror primary joints based on naming conventions."""
 
 import math
+import re
+from collections import deque
+from functools import lru_cache
 
+import maya.api.OpenMaya as om2
 import maya.cmds as cmds
 
 
+# "_L"/"_R" only count as a side token when the name ends or another token follows,
+# so names such as "spine_Low" or "hip_Root" are not mistaken for sided joints
+_SIDE_RE = re.compile(r"_([LR])(?=$|[_.|0-9])")
+
+
+@lru_cache(maxsize=None)
 def _mirror_name(name):
-    if "_L" in name:
-        return name.replace("_L", "_R", 1)
-    if "_R" in name:
-        return name.replace("_R", "_L", 1)
-    return None
+    match = _SIDE_RE.search(name)
+    if not match:
+        return None
+    other = "R" if match.group(1) == "L" else "L"
+    return name[:match.start(1)] + other + name[match.end(1):]
+
+
+def _exists(name):
+    try:
+        om2.MSelectionList().add(name)
+    except RuntimeError:
+        return False
+    return True
 
 
 def _uniquify(name):
-    if not cmds.objExists(name):
+    if not _exists(name):
         return name
     base = name
+    existing = {node.split("|")[-1] for node in cmds.ls(base + "*") or []}
     index = 1
-    while True:
-        candidate = f"{base}{index:02d}"
-        if not cmds.objExists(candidate):
-            return candidate
+    while f"{base}{index:02d}" in existing:
         index += 1
+    return f"{base}{index:02d}"
 
 def _to_long(node):
     result = cmds.ls(node, l=True)
@@ -45,7 +62,7 @@ def _ensure_suffix(joint):
     if not joint_long:
         return None
     short = joint_long.split("|")[-1]
-    if "_L" in short or "_R" in short:
+    if _SIDE_RE.search(short):
         return joint_long
 
     pos = cmds.xform(joint_long, q=True, ws=True, t=True)
@@ -55,7 +72,7 @@ def _ensure_suffix(joint):
 
     suffix = "_L" if x > 0.0 else "_R"
     new_short = short + suffix
-    if cmds.objExists(new_short):
+    if _exists(new_short):
         new_short = _uniquify(new_short)
     renamed = cmds.rename(joint_long, new_short)
     return _to_long(renamed) or renamed
@@ -66,134 +83,76 @@ def _ensure_hierarchy_suffix(joint):
     joint_long = _to_long(joint)
     if not joint_long:
         return None
-    stack = [joint_long]
-    new_root = None
-    visited = set()
-    while stack:
-        node = stack.pop()
-        node_long = _ensure_suffix(node)
-        if not node_long:
-            continue
-        if new_root is None:
-            new_root = node_long
-        if node_long in visited:
-            continue
-        visited.add(node_long)
-        children = cmds.listRelatives(node_long, c=True, type="joint", f=True) or []
-        stack.extend(children)
-    return new_root
-
-
+    nodes = cmds.listRelatives(joint_long, ad=True, type="joint", f=True) or []
+    # deepest first, so renaming a joint never invalidates a path still to visit
+    nodes.sort(key=lambda node: node.count("|"), reverse=True)
+    for node in nodes:
+        _ensure_suffix(node)
+    return _ensure_suffix(joint_long)
 
 
+_MIRROR_X = om2.MMatrix([
+    -1.0, 0.0, 0.0, 0.0,
+    0.0, 1.0, 0.0, 0.0,
+    0.0, 0.0, 1.0, 0.0,
+    0.0, 0.0, 0.0, 1.0,
+])
 
-def _apply_mirror_transform(node, freeze_scale=True):
-    node_long = _to_long(node)
-    if not node_long:
-        return None, None
-    node_short = node_long.split("|")[-1]
-    null_name = _uniquify(node_short + "_MirrorNull")
-    null = cmds.group(em=True, name=null_name)
-    cmds.xform(null, ws=True, t=(0.0, 0.0, 0.0), ro=(0.0, 0.0, 0.0))
-    try:
-        parented = cmds.parent(node_long, null) or []
-        if parented:
-            node_long = _to_long(parented[0]) or node_long
-        cmds.setAttr(null + ".scaleX", -1.0)
-        if freeze_scale:
-            cmds.makeIdentity(null, apply=True, t=False, r=False, s=True, n=False, pn=True)
-        parented = cmds.parent(node_long, w=True) or []
-        if parented:
-            node_long = _to_long(parented[0]) or node_long
-    except Exception:
-        if cmds.objExists(null):
-            cmds.delete(null)
-        return None, None
-    return node_long, null
 
+_HALF_TURN_Y = om2.MQuaternion(math.pi, om2.MVector(0.0, 1.0, 0.0))
 
 
-def _match_transform(target, source, pos=False, rot=False):
-    if not (pos or rot):
-        return
-    if hasattr(cmds, "matchTransform"):
-        cmds.matchTransform(target, source, pos=pos, rot=rot)
-        return
-    constraints = []
-    if pos and rot:
-        constraints.append(cmds.parentConstraint(source, target, mo=False))
-    elif rot:
-        constraints.append(cmds.orientConstraint(source, target, mo=False))
-    elif pos:
-        constraints.append(cmds.pointConstraint(source, target, mo=False))
-    if constraints:
-        cmds.delete(constraints)
-
-
+def _align_mirrored(source_joint, mirrored_joint):
+    """Place mirrored_joint at source_joint's world transform reflected across YZ.
 
-def _align_with_dummy(source_joint, mirrored_joint):
+    The reflected rotation is turned half way round its own Y axis and written
+    straight into jointOrient, with rotate zeroed, relative to the mirrored
+    joint's current parent.
+    """
     source_long = _to_long(source_joint)
     mirrored_long = _to_long(mirrored_joint)
     if not source_long or not mirrored_long:
         return
-    mirror_short = mirrored_long.split("|")[-1]
-    dummy_short = _uniquify(mirror_short + "_Dummy")
 
-    cleanup_nodes = set()
-    helper_null = None
-    dummy_long = None
-    try:
-        duplicated = cmds.duplicate(source_long, po=True, n=dummy_short)
-    except Exception:
-        return
-    if not duplicated:
-        return
+    source_matrix = om2.MMatrix(cmds.xform(source_long, q=True, ws=True, m=True))
+    reflected = om2.MTransformationMatrix(source_matrix * _MIRROR_X)
+    world_rotation = _HALF_TURN_Y * reflected.rotation(asQuaternion=True)
+    world_position = om2.MPoint(reflected.translation(om2.MSpace.kWorld))
 
-    cleanup_nodes.update(duplicated)
-    dummy = duplicated[0]
-    dummy_long = _to_long(dummy)
-    if not dummy_long:
-        return
+    parent_matrix = om2.MMatrix(cmds.getAttr(mirrored_long + ".parentMatrix"))
+    parent_rotation = om2.MTransformationMatrix(parent_matrix).rotation(asQuaternion=True)
+    orient = (world_rotation * parent_rotation.inverse()).asEulerRotation()
+    position = world_position * parent_matrix.inverse()
+    try:
+        cmds.setAttr(mirrored_long + ".translate", position.x, position.y, position.z)
+        cmds.setAttr(mirrored_long + ".rotate", 0.0, 0.0, 0.0)
+        cmds.setAttr(mirrored_long + ".jointOrient",
+                     math.degrees(orient.x), math.degrees(orient.y), math.degrees(orient.z))
+    except RuntimeError:
+        cmds.warning(u"{0} の向きを設定できませんでした。".format(mirrored_long))
 
-    dummy_long, helper_null = _apply_mirror_transform(dummy_long, freeze_scale=False)
-    if helper_null:
-        cleanup_nodes.add(helper_null)
-    if not dummy_long:
-        return
 
-    cleanup_nodes.add(dummy_long)
-    try:
-        _match_transform(mirrored_long, dummy_long, pos=True, rot=True)
-        cmds.rotate(0.0, 180.0, 0.0, mirrored_long, os=True, r=True, pcp=True)
-        cmds.makeIdentity(mirrored_long, apply=True, t=False, r=True, s=False, n=False, pn=True)
-    except Exception:
-        pass
-    finally:
-        existing = []
-        for node in cleanup_nodes:
-            if not cmds.objExists(node):
-                continue
-            node_long = _to_long(node) or node
-            existing.append(node_long)
-        if existing:
-            cmds.delete(list(set(existing)))
+def _parent_path(node_long):
+    """Return the parent's full path read off a full DAG path, or None at world level."""
+    return node_long.rsplit("|", 1)[0] or None
 
 
 def _determine_target_parent(source_joint, mirror_map):
-    parents = cmds.listRelatives(source_joint, p=True, f=True) or []
-    if not parents:
+    parent = _parent_path(source_joint)
+    if not parent:
         return None
 
-    parent = parents[0]
     parent_short = parent.split("|")[-1]
-    if "_L" in parent_short or "_R" in parent_short:
+    if _SIDE_RE.search(parent_short):
         mapped = mirror_map.get(parent)
         if mapped:
             return mapped
+        # the parent was mirrored by an earlier run, not this one
         mirrored_short = _mirror_name(parent_short)
         if mirrored_short:
             candidates = cmds.ls(mirrored_short, l=True)
             if candidates:
+                mirror_map[parent] = candidates[0]
                 return candidates[0]
     return parent
 
@@ -214,36 +173,23 @@ def _create_mirrored_joint(joint, mirror_map):
         mirror_map[joint_long] = existing[0]
         return None
 
-    duplicated_list = cmds.duplicate(joint_long)
+    # mirror_short is known to be free here, so duplicate can name the root directly
+    duplicated_list = cmds.duplicate(joint_long, rr=True, n=mirror_short)
     if not duplicated_list:
         cmds.warning(u"{0} の複製に失敗しました。".format(joint_long))
         return None
 
     duplicated = duplicated_list[0]
-    try:
-        duplicated = cmds.rename(duplicated, mirror_short)
-    except RuntimeError:
-        cmds.warning(u"{0} のリネームに失敗しました。".format(mirror_short))
-        cmds.delete(duplicated)
-        return None
-
     duplicated_long = _to_long(duplicated)
     if not duplicated_long:
         cmds.warning(u"複製したジョイント {0} を取得できませんでした。".format(mirror_short))
         cmds.delete(duplicated)
         return None
 
-    duplicated_long, helper_null = _apply_mirror_transform(duplicated_long, freeze_scale=True)
-    if not duplicated_long:
-        cmds.warning(u"{0} ?????????????".format(mirror_short))
-        if helper_null and cmds.objExists(helper_null):
-            cmds.delete(helper_null)
-        return None
-    if helper_null and cmds.objExists(helper_null):
-        cmds.delete(helper_null)
-
+    # the duplicate starts out as a sibling of the source joint
     target_parent = _determine_target_parent(joint_long, mirror_map)
-    if target_parent:
+    source_parent = _parent_path(joint_long)
+    if target_parent and target_parent != source_parent:
         parented = cmds.parent(duplicated_long, target_parent) or []
         if parented:
             duplicated_long = _to_long(parented[0]) or duplicated_long
@@ -252,44 +198,40 @@ def _create_mirrored_joint(joint, mirror_map):
     created_nodes = [duplicated_long]
     alignment_pairs = [(joint_long, duplicated_long)]
 
-    queue = [(joint_long, duplicated_long)]
-    while queue:
-        source, mirrored = queue.pop(0)
-        src_children = cmds.listRelatives(source, c=True, type='joint', f=True) or []
-        mirrored_children = cmds.listRelatives(mirrored, c=True, type='joint', f=True) or []
-        if len(src_children) != len(mirrored_children):
-            cmds.warning('Child count mismatch while mirroring {0}'.format(source.split('|')[-1]))
-        for src_child, mirrored_child in zip(src_children, mirrored_children):
-            src_child_long = _to_long(src_child)
-            mirrored_child_long = _to_long(mirrored_child)
-            if not src_child_long or not mirrored_child_long:
-                continue
-            src_short = src_child_long.split('|')[-1]
-            target_short = _mirror_name(src_short)
-            if target_short:
-                if cmds.objExists(target_short):
-                    target_short = _uniquify(target_short)
-                try:
-                    renamed_child = cmds.rename(mirrored_child_long, target_short)
-                    mirrored_child_long = _to_long(renamed_child)
-                except RuntimeError:
-                    cmds.warning('Failed to rename duplicated child {0}'.format(target_short))
-                    mirrored_child_long = _to_long(mirrored_child_long)
-            else:
-                mirrored_child_long = _to_long(mirrored_child_long)
-            if not mirrored_child_long:
-                continue
-            mirror_map[src_child_long] = mirrored_child_long
-            created_nodes.append(mirrored_child_long)
-            alignment_pairs.append((src_child_long, mirrored_child_long))
-            queue.append((src_child_long, mirrored_child_long))
+    # duplicate keeps child names, so each source descendant maps to the
+    # duplicated node at the same relative path
+    src_descendants = cmds.listRelatives(joint_long, ad=True, type='joint', f=True) or []
+    # deepest first, so a rename never invalidates a path that is still to be renamed
+    src_descendants.sort(key=lambda node: node.count('|'), reverse=True)
+    renamed_shorts = {}
+    for src_child in src_descendants:
+        target_short = _mirror_name(src_child.split('|')[-1])
+        if not target_short:
+            continue
+        if _exists(target_short):
+            target_short = _uniquify(target_short)
+        try:
+            renamed_child = cmds.rename(duplicated_long + src_child[len(joint_long):], target_short)
+            renamed_shorts[src_child] = renamed_child.split('|')[-1]
+        except RuntimeError:
+            cmds.warning('Failed to rename duplicated child {0}'.format(target_short))
+
+    for src_child in reversed(src_descendants):
+        src_path = joint_long
+        mirrored_child_long = duplicated_long
+        for part in src_child[len(joint_long) + 1:].split('|'):
+            src_path = src_path + '|' + part
+            mirrored_child_long = mirrored_child_long + '|' + renamed_shorts.get(src_path, part)
+        mirror_map[src_child] = mirrored_child_long
+        created_nodes.append(mirrored_child_long)
+        alignment_pairs.append((src_child, mirrored_child_long))
 
     for source_node, mirrored_node in alignment_pairs:
-        _align_with_dummy(source_node, mirrored_node)
+        _align_mirrored(source_node, mirrored_node)
 
     return created_nodes
 
-def _mirror_joint_recursive(joint, mirror_map, created):
+def _mirror_joint_hierarchy(joint, mirror_map, created):
     joint_long = _to_long(joint)
     if not joint_long:
         return
@@ -311,8 +253,9 @@ def mirror_primary_joints():
         selection = sorted(selection, key=lambda node: node.count("|"))
         selected_set = set()
         for joint in selection:
-            parents = set(cmds.listRelatives(joint, p=True, f=True) or [])
-            if parents & selected_set:
+            # a joint under any selected ancestor is mirrored with that ancestor's subtree
+            parts = joint.split("|")
+            if any("|".join(parts[:i]) in selected_set for i in range(2, len(parts))):
                 continue
             selected.append(joint)
             selected_set.add(joint)
@@ -322,20 +265,30 @@ def mirror_primary_joints():
         cmds.warning(u"ミラーするジョイントを選択してください。")
         return
     cmds.undoInfo(openChunk=True)
-    roots = selected
-
-    mirror_map = {}
-    created = []
-    for root in roots:
-        _mirror_joint_recursive(root, mirror_map, created)
-
-    if created:
-        cmds.select(created, r=True)
-        try:
-            cmds.inform(u"{0} 個のジョイントをミラー作成しました。".format(len(created)))
-        except AttributeError:
-            # cmds.inform は 2022+ で導入。存在しない場合は print のみ。
-            print(u"{0} 個のジョイントをミラー作成しました。".format(len(created)))
-    else:
-        cmds.warning(u"新たにミラーされたジョイントはありませんでした。")
-    cmds.undoInfo(closeChunk=True)
+    prev_eval_mode = cmds.evaluationManager(q=True, mode=True)[0]
+    prev_refresh_suspended = cmds.refresh(query=True, suspend=True)
+    cmds.evaluationManager(mode="off")
+    cmds.refresh(suspend=True)
+    try:
+        # roots are depth sorted, so a mirrored parent is always in mirror_map
+        # before _determine_target_parent is asked about its children
+        roots = deque(selected)
+
+        mirror_map = {}
+        created = []
+        while roots:
+            _mirror_joint_hierarchy(roots.popleft(), mirror_map, created)
+
+        if created:
+            cmds.select(created, r=True)
+            try:
+                cmds.inform(u"{0} 個のジョイントをミラー作成しました。".format(len(created)))
+            except AttributeError:
+                # cmds.inform は 2022+ で導入。存在しない場合は print のみ。
+                print(u"{0} 個のジョイントをミラー作成しました。".format(len(created)))
+        else:
+            cmds.warning(u"新たにミラーされたジョイントはありませんでした。")
+    finally:
+        cmds.refresh(suspend=prev_refresh_suspended)
+        cmds.evaluationManager(mode=prev_eval_mode)
+        cmds.undoInfo(closeChunk=True)
@@ -6,6 +6,8 @@ generated by ARigTool helpers. Select the source joint on one side (_L or
 _R naming) and the script will attempt to reproduce its setup—including
 driven keys—on the opposite side.
 """
+import re
+
 import maya.cmds as cmds
 
 from CreateHalfRotJoint import (
@@ -18,6 +20,8 @@ from CreateTwistChain import (
 )
 
 SUPPORT_LAYER = "support_jnt"
+# "_L"/"_R" side token, only when the name ends or another token follows
+_SIDE_RE = re.compile(r"_([LR])(?=$|[_.|0-9])")
 ANIM_CURVE_TYPES = (
     "animCurveUL",
     "animCurveUA",
@@ -57,10 +61,10 @@ def _strip_reverse_suffix(name):
 def _mirror_name(name):
     base = _strip_reverse_suffix(name)
     mirrored = None
-    if "_L" in base:
-        mirrored = base.replace("_L", "_R", 1)
-    elif "_R" in base:
-        mirrored = base.replace("_R", "_L", 1)
+    match = _SIDE_RE.search(base)
+    if match:
+        other = "R" if match.group(1) == "L" else "L"
+        mirrored = base[:match.start(1)] + other + base[match.end(1):]
 
     if not mirrored:
         return None
@@ -77,12 +81,11 @@ def _uniquify(name):
     if not cmds.objExists(name):
         return name
     base = name
+    existing = {node.split("|")[-1] for node in cmds.ls(base + "*") or []}
     idx = 1
-    while True:
-        candidate = f"{base}{idx:02d}"
-        if not cmds.objExists(candidate):
-            return candidate
+    while f"{base}{idx:02d}" in existing:
         idx += 1
+    return f"{base}{idx:02d}"
 
 
 def _ensure_display_layer(name):
@@ -288,8 +291,10 @@ def _copy_driven_keys(src, dst, attrs):
 def _collect_support_data(start, mirror_start):
     start_short = start.split("|")[-1]
     mirror_short = mirror_start.split("|")[-1] if mirror_start else None
-    if start_short.endswith("_L") or start_short.endswith("_R"):
-        base_name = start_short[:-2]
+    start_match = _SIDE_RE.search(start_short)
+    start_side = start_match.group(1) if start_match else None
+    if start_match and start_match.end() == len(start_short):
+        base_name = start_short[:start_match.start()]
     else:
         base_name = start_short
     joints = cmds.ls(type="joint", l=True) or []
@@ -300,14 +305,10 @@ def _collect_support_data(start, mirror_start):
             continue
         if "_Sup" not in short:
             continue
-        if "_L" in start_short and "_L" not in short:
-            continue
-        if "_R" in start_short and "_R" not in short:
-            continue
-        if "_L" in start_short and "_R" in short:
-            continue
-        if "_R" in start_short and "_L" in short:
-            continue
+        if start_side:
+            match = _SIDE_RE.search(short)
+            if not match or match.group(1) != start_side:
+                continue
         parent = cmds.listRelatives(joint, p=True, f=True)
         radius = 1.0
         try:
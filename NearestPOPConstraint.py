@@ -1,7 +1,45 @@
 # -*- coding: utf-8 -*-
+from bisect import bisect_left
+
+import maya.api.OpenMaya as om2
 import maya.cmds as cmds
 
 
+def _nearest_vertex_indices(vtx_positions, points):
+    """Return the index of the closest vertex for each point.
+
+    Vertices are sorted along X once; each query starts at its own X and
+    walks outwards until the X gap alone exceeds the best distance found.
+    """
+    order = sorted(range(len(vtx_positions)), key=lambda i: vtx_positions[i][0])
+    xs = [vtx_positions[i][0] for i in order]
+    count = len(xs)
+    result = []
+    for px, py, pz in points:
+        best = float("inf")
+        best_idx = -1
+        hi = bisect_left(xs, px)
+        lo = hi - 1
+        while True:
+            d_lo = (px - xs[lo]) ** 2 if lo >= 0 else float("inf")
+            d_hi = (xs[hi] - px) ** 2 if hi < count else float("inf")
+            if min(d_lo, d_hi) >= best:
+                break
+            if d_lo <= d_hi:
+                idx = order[lo]
+                lo -= 1
+            else:
+                idx = order[hi]
+                hi += 1
+            vx, vy, vz = vtx_positions[idx]
+            dist2 = (px - vx) ** 2 + (py - vy) ** 2 + (pz - vz) ** 2
+            if dist2 < best:
+                best = dist2
+                best_idx = idx
+        result.append(best_idx)
+    return result
+
+
 def nearest_point_on_poly_constraint(mesh=None, controls=None, maintain_offset=False):
     if controls is None:
         controls = []
@@ -24,16 +62,17 @@ def nearest_point_on_poly_constraint(mesh=None, controls=None, maintain_offset=F
         cmds.error(u"メッシュ形状が見つかりません: {0}".format(mesh))
     mesh_shape = mesh_shapes[0]
 
-    ctrl_positions = [tuple(cmds.xform(ctrl, q=True, ws=True, rp=True)) for ctrl in controls]
-    vtx_count = cmds.polyEvaluate(mesh_shape, v=True)
-    vtx_positions = [tuple(cmds.pointPosition(f"{mesh_shape}.vtx[{i}]", w=True)) for i in range(vtx_count)]
-
-    def _dist2(a, b):
-        return (a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2 + (a[2] - b[2]) ** 2
+    ctrl_positions = []
+    for ctrl in controls:
+        ctrl_path = om2.MSelectionList().add(ctrl).getDagPath(0)
+        pivot = om2.MFnTransform(ctrl_path).rotatePivot(om2.MSpace.kWorld)
+        ctrl_positions.append((pivot.x, pivot.y, pivot.z))
+    mesh_fn = om2.MFnMesh(om2.MSelectionList().add(mesh_shape).getDagPath(0))
+    vtx_positions = [(p.x, p.y, p.z) for p in mesh_fn.getPoints(om2.MSpace.kWorld)]
+    nearest_indices = _nearest_vertex_indices(vtx_positions, ctrl_positions)
 
     created = []
-    for ctrl, pos in zip(controls, ctrl_positions):
-        nearest_idx = min(range(vtx_count), key=lambda i: _dist2(pos, vtx_positions[i]))
+    for ctrl, nearest_idx in zip(controls, nearest_indices):
         vtx_comp = f"{mesh_shape}.vtx[{nearest_idx}]"
         constraint = cmds.pointOnPolyConstraint(vtx_comp, ctrl, mo=maintain_offset)[0]
         created.append((ctrl, constraint, vtx_comp))
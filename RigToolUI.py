@@ -4,7 +4,7 @@ import os
 import sys
 from functools import partial
 
-from PySide2 import QtCore, QtWidgets
+from PySide2 import QtCore, QtGui, QtWidgets
 from shiboken2 import wrapInstance
 
 import maya.OpenMayaUI as omui
@@ -23,29 +23,66 @@ def maya_main_window():
     return wrapInstance(int(ptr), QtWidgets.QWidget)
 
 
+_MODULE_CACHE = {}
+
+
 def _load_module(module_name):
-    module = sys.modules.get(module_name)
-    if module is not None:
-        module = importlib.reload(module)
-    else:
+    module = _MODULE_CACHE.get(module_name)
+    if module is None:
         module = importlib.import_module(module_name)
+        _MODULE_CACHE[module_name] = module
     return module
 
 
+def _reload_modules():
+    modules = list(_MODULE_CACHE.values())
+    _MODULE_CACHE.clear()
+    for module in modules:
+        _MODULE_CACHE[module.__name__] = importlib.reload(module)
+    print(u"{0} 個のモジュールを再読み込みしました。".format(len(modules)))
+
+
 def _call_module_function(module_name, func_name, *args, **kwargs):
     module = _load_module(module_name)
     func = getattr(module, func_name)
     return func(*args, **kwargs)
 
 
+class _ResolvedCall(object):
+    """Call module_name.func_name, resolving the function on first use.
+
+    The function is looked up again only after the module has been reloaded.
+    """
+
+    def __init__(self, module_name, func_name):
+        self.module_name = module_name
+        self.func_name = func_name
+        self.module = None
+        self.func = None
+
+    def __call__(self, *args, **kwargs):
+        module = _load_module(self.module_name)
+        if module is not self.module:
+            self.module = module
+            self.func = getattr(module, self.func_name)
+        return self.func(*args, **kwargs)
+
+
 def _open_lmrigger():
     module = _load_module("LMRigger")
     module.LMriggerDialog.show_dialog()
 
 
+_RIG111_MEL_PATH = os.path.join(MODULE_DIR, "rig111wireController.mel").replace("\\", "/")
+_rig111_sourced = False
+
+
 def _open_rig111_wire_controllers():
-    mel_path = os.path.join(MODULE_DIR, "rig111wireController.mel").replace("\\", "/")
-    mel.eval(f'source "{mel_path}";')
+    # MELのプロシージャはセッション中保持されるので source は初回のみ
+    global _rig111_sourced
+    if not _rig111_sourced:
+        mel.eval(f'source "{_RIG111_MEL_PATH}";')
+        _rig111_sourced = True
     mel.eval("rig111WireControllers();")
 
 
@@ -195,128 +232,137 @@ def _run_with_warning(callback):
         raise
 
 
-TOOL_CATEGORIES = [
-    (
-        u"ジョイントセットアップ",
-        [
-            {
-                "label": u"Create Twist Chain",
-                "tooltip": u"開始ジョイントを選択すると子から参照ジョイントを自動検出してツイスト用補助ジョイントを作成します。",
-                "callback": _create_twist_chain_with_count_dialog,
-            },
-            {
-                "label": u"Twist Chain Editor",
-                "tooltip": u"選択したジョイント直下のツイストジョイントに設定されたツイストウェイトとスケール最大値を一覧で編集します。",
-                "callback": partial(_run_with_warning, _open_twist_chain_editor_dialog),
-            },
-            {
-                "label": u"Create Half Rotation Joint",
-                "tooltip": u"選択したジョイントに半回転ジョイントとINFジョイントを生成し、回転を0.5倍に接続します。",
-                "callback": partial(_call_module_function, "CreateHalfRotJoint", "show_half_rotation_dialog"),
-            },
-            {
-                "label": u"Create Support Joint",
-                "tooltip": u"選択したジョイントを親としてサポートジョイントを作成し、support_jntレイヤーに追加します。",
-                "callback": partial(_call_module_function, "CreateSupportJoint", "create_support_joint"),
-            },
-            {
-                "label": u"Mirror Primary Joint",
-                "tooltip": u"選択したプライマリジョイント階層を左右反転した位置と命名規則で複製します。",
-                "callback": partial(_call_module_function, "MirrorPrimaryJoint", "mirror_primary_joints"),
-            },
-            {
-                "label": u"Mirror Twist & Half Joint",
-                "tooltip": u"選択したジョイントのTwistチェーンとHalfジョイントを名前規則に基づいて反対側に複製します。",
-                "callback": partial(_call_module_function, "MirrorTwistHalfJoint", "mirror_twist_and_half"),
-            },
-            {
-                "label": u"Driven Key Helper",
-                "tooltip": u"選択したジョイントをソースにTwist/Half用ジョイントへドリブンキーを設定します。",
-                "callback": partial(_run_with_warning, _open_driven_key_helper),
-            },
-            {
-                "label": u"Driven Key Matrix",
-                "tooltip": u"選択したジョイントに設定されたドリブンキーを行列で確認・編集します。",
-                "callback": partial(_run_with_warning, _open_driven_key_matrix),
-            },
-            {
-                "label": u"Check Motion Tool",
-                "tooltip": u"指定したジョイントにチェックモーション用のキーを自動生成します。",
-                "callback": partial(_run_with_warning, _open_check_motion_tool),
-            },
-            {
-                "label": u"Bind Skin (Skip Half)",
-                "tooltip": u"選択したジョイント階層からHalfジョイントを除外し、Half_INFジョイントを含めてバインドします。",
-                "callback": partial(_call_module_function, "SkinBindTool", "bind_skin_excluding_half"),
-            },
-            {
-                "label": u"Simple Rig From Ctrl + Joints",
-                "tooltip": u"コントローラーを1つ、続いてジョイントを選択し、複製コントローラーとゼログループを自動配置します。",
-                "callback": partial(_call_module_function, "csimplerig", "simple_rig_from_ctrl_and_joints"),
-            },
-            {
-                "label": u"Create Eyelid Rig",
-                "tooltip": u"複製元コントローラーとまぶたジョイントを選択し、Aim/Parentコンストレイント付きのセットアップを構築します。",
-                "callback": partial(_call_module_function, "ArigUtil", "create_eyelid_rig"),
-            },
-            {
-                "label": u"Create Stretchy Spline IK",
-                "tooltip": u"開始ジョイントと終了ジョイントを選択してストレッチ付きスプラインIKとクラスタを作成します。",
-                "callback": partial(_call_module_function, "ArigUtil", "create_stretchy_spline_ik_from_selection"),
-            },
-        ],
-    ),
-    (
-        u"コントローラー補助",
-        [
-            {
-                "label": u"Build Poly Loop",
-                "tooltip": u"3つ以上のコントローラーを選択し、その位置を頂点とする1フェースのポリゴンを生成します。",
-                "callback": partial(_call_module_function, "buildpoly", "build_poly"),
-            },
-            {
-                "label": u"Build Poly + Nearest Constrain",
-                "tooltip": u"メッシュとコントローラーを選択し、最寄り頂点へ pointOnPolyConstraint で拘束するゼログループを挿入します。",
-                "callback": partial(_call_module_function, "ArigUtil", "build_poly_and_constrain_to_nearest_vertices"),
-            },
-            {
-                "label": u"Nearest PointOnPoly Constraint",
-                "tooltip": u"メッシュとトランスフォームを選んで、各トランスフォームを最も近い頂点へ pointOnPolyConstraint します。",
-                "callback": partial(_call_module_function, "NearestPOPConstraint", "nearest_point_on_poly_constraint"),
-            },
-            {
-                "label": u"Connect Translate Attributes",
-                "tooltip": u"最初に駆動元、続いて接続先を選択して translate XYZ を一括接続します。",
-                "callback": partial(_call_module_function, "ArigUtil", "connect_translate_from_target"),
-            },
-            {
-                "label": u"Delete Constraints In Hierarchy",
-                "tooltip": u"選択階層内に存在するコンストレイントノードをまとめて削除します。",
-                "callback": partial(_call_module_function, "ArigUtil", "delete_constraints_in_selection_hierarchy"),
-            },
-            {
-                "label": u"Create Matched Locators",
-                "tooltip": u"選択オブジェクトの位置・回転に合わせたロケータを作成し選択し直します。",
-                "callback": partial(_call_module_function, "ArigUtil", "create_locators_with_match_transform"),
-            },
-        ],
-    ),
-    (
-        u"外部ツール",
-        [
-            {
-                "label": u"LMRigger",
-                "tooltip": u"LMrigger 2.7.23 のUIを開きます。",
-                "callback": _open_lmrigger,
-            },
-            {
-                "label": u"rig111 Wire Controllers",
-                "tooltip": u"rig111 wireControllers のMELウィンドウを開き、選択に合わせてカーブを配置します。",
-                "callback": _open_rig111_wire_controllers,
-            },
-        ],
-    ),
-]
+_tool_categories = None
+
+
+def _build_tool_categories():
+    global _tool_categories
+    if _tool_categories is not None:
+        return _tool_categories
+
+    _tool_categories = [
+        (
+            u"ジョイントセットアップ",
+            [
+                {
+                    "label": u"Create Twist Chain",
+                    "tooltip": u"開始ジョイントを選択すると子から参照ジョイントを自動検出してツイスト用補助ジョイントを作成します。",
+                    "callback": _create_twist_chain_with_count_dialog,
+                },
+                {
+                    "label": u"Twist Chain Editor",
+                    "tooltip": u"選択したジョイント直下のツイストジョイントに設定されたツイストウェイトとスケール最大値を一覧で編集します。",
+                    "callback": partial(_run_with_warning, _open_twist_chain_editor_dialog),
+                },
+                {
+                    "label": u"Create Half Rotation Joint",
+                    "tooltip": u"選択したジョイントに半回転ジョイントとINFジョイントを生成し、回転を0.5倍に接続します。",
+                    "callback": _ResolvedCall("CreateHalfRotJoint", "show_half_rotation_dialog"),
+                },
+                {
+                    "label": u"Create Support Joint",
+                    "tooltip": u"選択したジョイントを親としてサポートジョイントを作成し、support_jntレイヤーに追加します。",
+                    "callback": _ResolvedCall("CreateSupportJoint", "create_support_joint"),
+                },
+                {
+                    "label": u"Mirror Primary Joint",
+                    "tooltip": u"選択したプライマリジョイント階層を左右反転した位置と命名規則で複製します。",
+                    "callback": _ResolvedCall("MirrorPrimaryJoint", "mirror_primary_joints"),
+                },
+                {
+                    "label": u"Mirror Twist & Half Joint",
+                    "tooltip": u"選択したジョイントのTwistチェーンとHalfジョイントを名前規則に基づいて反対側に複製します。",
+                    "callback": _ResolvedCall("MirrorTwistHalfJoint", "mirror_twist_and_half"),
+                },
+                {
+                    "label": u"Driven Key Helper",
+                    "tooltip": u"選択したジョイントをソースにTwist/Half用ジョイントへドリブンキーを設定します。",
+                    "callback": partial(_run_with_warning, _open_driven_key_helper),
+                },
+                {
+                    "label": u"Driven Key Matrix",
+                    "tooltip": u"選択したジョイントに設定されたドリブンキーを行列で確認・編集します。",
+                    "callback": partial(_run_with_warning, _open_driven_key_matrix),
+                },
+                {
+                    "label": u"Check Motion Tool",
+                    "tooltip": u"指定したジョイントにチェックモーション用のキーを自動生成します。",
+                    "callback": partial(_run_with_warning, _open_check_motion_tool),
+                },
+                {
+                    "label": u"Bind Skin (Skip Half)",
+                    "tooltip": u"選択したジョイント階層からHalfジョイントを除外し、Half_INFジョイントを含めてバインドします。",
+                    "callback": _ResolvedCall("SkinBindTool", "bind_skin_excluding_half"),
+                },
+                {
+                    "label": u"Simple Rig From Ctrl + Joints",
+                    "tooltip": u"コントローラーを1つ、続いてジョイントを選択し、複製コントローラーとゼログループを自動配置します。",
+                    "callback": _ResolvedCall("csimplerig", "simple_rig_from_ctrl_and_joints"),
+                },
+                {
+                    "label": u"Create Eyelid Rig",
+                    "tooltip": u"複製元コントローラーとまぶたジョイントを選択し、Aim/Parentコンストレイント付きのセットアップを構築します。",
+                    "callback": _ResolvedCall("ArigUtil", "create_eyelid_rig"),
+                },
+                {
+                    "label": u"Create Stretchy Spline IK",
+                    "tooltip": u"開始ジョイントと終了ジョイントを選択してストレッチ付きスプラインIKとクラスタを作成します。",
+                    "callback": _ResolvedCall("ArigUtil", "create_stretchy_spline_ik_from_selection"),
+                },
+            ],
+        ),
+        (
+            u"コントローラー補助",
+            [
+                {
+                    "label": u"Build Poly Loop",
+                    "tooltip": u"3つ以上のコントローラーを選択し、その位置を頂点とする1フェースのポリゴンを生成します。",
+                    "callback": _ResolvedCall("buildpoly", "build_poly"),
+                },
+                {
+                    "label": u"Build Poly + Nearest Constrain",
+                    "tooltip": u"メッシュとコントローラーを選択し、最寄り頂点へ pointOnPolyConstraint で拘束するゼログループを挿入します。",
+                    "callback": _ResolvedCall("ArigUtil", "build_poly_and_constrain_to_nearest_vertices"),
+                },
+                {
+                    "label": u"Nearest PointOnPoly Constraint",
+                    "tooltip": u"メッシュとトランスフォームを選んで、各トランスフォームを最も近い頂点へ pointOnPolyConstraint します。",
+                    "callback": _ResolvedCall("NearestPOPConstraint", "nearest_point_on_poly_constraint"),
+                },
+                {
+                    "label": u"Connect Translate Attributes",
+                    "tooltip": u"最初に駆動元、続いて接続先を選択して translate XYZ を一括接続します。",
+                    "callback": _ResolvedCall("ArigUtil", "connect_translate_from_target"),
+                },
+                {
+                    "label": u"Delete Constraints In Hierarchy",
+                    "tooltip": u"選択階層内に存在するコンストレイントノードをまとめて削除します。",
+                    "callback": _ResolvedCall("ArigUtil", "delete_constraints_in_selection_hierarchy"),
+                },
+                {
+                    "label": u"Create Matched Locators",
+                    "tooltip": u"選択オブジェクトの位置・回転に合わせたロケータを作成し選択し直します。",
+                    "callback": _ResolvedCall("ArigUtil", "create_locators_with_match_transform"),
+                },
+            ],
+        ),
+        (
+            u"外部ツール",
+            [
+                {
+                    "label": u"LMRigger",
+                    "tooltip": u"LMrigger 2.7.23 のUIを開きます。",
+                    "callback": _open_lmrigger,
+                },
+                {
+                    "label": u"rig111 Wire Controllers",
+                    "tooltip": u"rig111 wireControllers のMELウィンドウを開き、選択に合わせてカーブを配置します。",
+                    "callback": _open_rig111_wire_controllers,
+                },
+            ],
+        ),
+    ]
+    return _tool_categories
 
 
 class RigToolLauncher(QtWidgets.QDialog):
@@ -331,7 +377,9 @@ class RigToolLauncher(QtWidgets.QDialog):
         cls._instance.activateWindow()
         return cls._instance
 
-    def __init__(self, parent=maya_main_window()):
+    def __init__(self, parent=None):
+        if parent is None:
+            parent = maya_main_window()
         super(RigToolLauncher, self).__init__(parent)
         self.setObjectName("arigToolLauncher")
         self.setWindowTitle("ARig Tool Launcher")
@@ -341,33 +389,117 @@ class RigToolLauncher(QtWidgets.QDialog):
         self._create_widgets()
         self._create_layout()
 
+        # 開発用: ツールモジュールをまとめて再読み込みする隠しショートカット
+        self.reload_shortcut = QtWidgets.QShortcut(QtGui.QKeySequence("Ctrl+Shift+R"), self)
+        self.reload_shortcut.activated.connect(partial(_run_with_warning, _reload_modules))
+
     def _create_widgets(self):
-        self.scroll_area = QtWidgets.QScrollArea()
-        self.scroll_area.setWidgetResizable(True)
-
-        container = QtWidgets.QWidget()
-        self.scroll_area.setWidget(container)
-        self.tools_layout = QtWidgets.QVBoxLayout(container)
-        self.tools_layout.setContentsMargins(6, 6, 6, 6)
-        self.tools_layout.setSpacing(12)
-
-        for category_name, tools in TOOL_CATEGORIES:
-            group = QtWidgets.QGroupBox(category_name)
-            vbox = QtWidgets.QVBoxLayout(group)
+        self.tool_box = QtWidgets.QToolBox()
+        self.category_tools = []
+
+        for category_name, tools in _build_tool_categories():
+            page = QtWidgets.QWidget()
+            page.setProperty("populated", False)
+            self.tool_box.addItem(page, category_name)
+            self.category_tools.append(tools)
+
+        # ボタンはカテゴリを初めて開いた時に作成する
+        self.tool_box.currentChanged.connect(self._on_category_changed)
+        self._on_category_changed(self.tool_box.currentIndex())
+
+        self.batch_checkbox = QtWidgets.QCheckBox(u"Batch mode")
+        self.batch_checkbox.setToolTip(
+            u"有効な間のシーン編集(ツール実行に限らず手動の編集も含む)をまとめて1回のアンドゥで戻せるようにします。"
+        )
+        self.commit_batch_button = QtWidgets.QPushButton(u"Commit batch")
+        self.commit_batch_button.setToolTip(
+            u"ここまでの操作を1つのアンドゥステップとして確定し、新しいバッチを開始します。"
+        )
+        self.commit_batch_button.setEnabled(False)
+        self.batch_chunk_open = False
+        self.batch_jobs = []
+
+        self.batch_checkbox.toggled.connect(self._on_batch_toggled)
+        self.commit_batch_button.clicked.connect(self._commit_batch)
+
+    def _on_category_changed(self, index):
+        if index < 0:
+            return
+        self._populate_category(self.tool_box.widget(index), self.category_tools[index])
+
+    def _populate_category(self, page, tools):
+        if page.property("populated"):
+            return
+        # 追加のたびに再描画しないよう、まとめて作ってから1回だけ更新する
+        page.setUpdatesEnabled(False)
+        try:
+            vbox = QtWidgets.QVBoxLayout(page)
+            vbox.setContentsMargins(6, 6, 6, 6)
             vbox.setSpacing(6)
             for tool in tools:
                 button = QtWidgets.QPushButton(tool["label"])
                 button.setToolTip(tool["tooltip"])
                 button.clicked.connect(partial(_run_with_warning, tool["callback"]))
                 vbox.addWidget(button)
-            self.tools_layout.addWidget(group)
-
-        self.tools_layout.addStretch(1)
+            vbox.addStretch(1)
+            page.setProperty("populated", True)
+        finally:
+            page.setUpdatesEnabled(True)
 
     def _create_layout(self):
         main_layout = QtWidgets.QVBoxLayout(self)
         main_layout.setContentsMargins(6, 6, 6, 6)
-        main_layout.addWidget(self.scroll_area)
+        main_layout.addWidget(self.tool_box)
+
+        batch_layout = QtWidgets.QHBoxLayout()
+        batch_layout.addWidget(self.batch_checkbox)
+        batch_layout.addStretch(1)
+        batch_layout.addWidget(self.commit_batch_button)
+        main_layout.addLayout(batch_layout)
+
+    def _open_batch_chunk(self):
+        if not self.batch_chunk_open:
+            cmds.undoInfo(openChunk=True, chunkName="ARigToolBatch")
+            self.batch_chunk_open = True
+
+    def _close_batch_chunk(self):
+        if self.batch_chunk_open:
+            cmds.undoInfo(closeChunk=True)
+            self.batch_chunk_open = False
+        self.batch_jobs = []
+
+    def _on_batch_toggled(self, enabled):
+        # 各ツールのアンドゥチャンクはバッチ用チャンクの内側にネストされる
+        if enabled:
+            self._open_batch_chunk()
+        else:
+            self._close_batch_chunk()
+        self.commit_batch_button.setEnabled(enabled)
+
+    def _commit_batch(self):
+        self._close_batch_chunk()
+        if self.batch_checkbox.isChecked():
+            self._open_batch_chunk()
+
+    def _end_batch(self):
+        self.batch_checkbox.setChecked(False)
+
+    def showEvent(self, event):
+        super(RigToolLauncher, self).showEvent(event)
+        if not self.batch_jobs:
+            # シーンが切り替わったらバッチ用チャンクを開いたままにしない
+            self.batch_jobs = [cmds.scriptJob(event=[event_name, self._end_batch],
+                                              parent=self.objectName())
+                               for event_name in ("NewSceneOpened", "SceneOpened")]
+
+    def hideEvent(self, event):
+        # Esc (reject) では closeEvent が呼ばれないため、非表示になった時点でバッチを閉じる
+        self._end_batch()
+        for job in self.batch_jobs:
+            if cmds.scriptJob(exists=job):
+                cmds.scriptJob(kill=job, force=True)
+        self.batch_jobs = []
+        super(RigToolLauncher, self).hideEvent(event)
 
 
 if __name__ == "__main__":
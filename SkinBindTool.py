@@ -1,64 +1,64 @@
 # -*- coding: utf-8 -*-
 """Utilities for skin binding operations used from the ARig tool UI."""
 
+import re
+
+import maya.api.OpenMaya as om2
 import maya.cmds as cmds
 
 
+# Half joints are skipped unless the name also contains Half_INF; "_D" joints are always skipped.
+_SKIP_JOINT_RE = re.compile(r"^(?!.*Half_INF).*Half|_D")
+
+_BIND_GEOMETRY_TYPES = ("mesh", "nurbsSurface", "lattice")
+
+
 def _short_name(node):
-    return node.split("|")[-1]
+    return node.rpartition("|")[2]
 
 
-def _is_bind_geometry(node):
-    """Return True if the node can be used as a bind target geometry."""
+def _is_bind_geometry(node, node_type=None):
+    """Return True if the node can be used as a bind target geometry.
 
-    if not cmds.objExists(node):
-        return False
+    node_type may be passed when it is already known, to skip the lookup.
+    """
+
+    if node_type is None:
+        if not cmds.objExists(node):
+            return False
+        node_type = cmds.nodeType(node)
 
-    node_type = cmds.nodeType(node)
-    if node_type in {"mesh", "nurbsSurface", "lattice"}:
+    if node_type in _BIND_GEOMETRY_TYPES:
         return True
 
     if node_type != "transform":
         return False
 
-    shapes = cmds.listRelatives(node, shapes=True, fullPath=True) or []
-    for shape in shapes:
-        if cmds.nodeType(shape) in {"mesh", "nurbsSurface", "lattice"}:
-            return True
-    return False
+    return bool(cmds.listRelatives(node, shapes=True, type=_BIND_GEOMETRY_TYPES, fullPath=True))
 
 
 def _collect_bind_joints(root):
     """Collect joints under the root excluding Half joints except Half_INF."""
 
-    joints = []
-
-    full_root = cmds.ls(root, long=True) or []
-    if not full_root:
-        return joints
-
-    root_path = full_root[0]
-
-    descendants = cmds.listRelatives(root_path, allDescendents=True, type="joint", fullPath=True) or []
-    descendants = list(reversed(descendants))
+    selection_list = om2.MSelectionList()
+    try:
+        selection_list.add(root)
+        root_dag = selection_list.getDagPath(0)
+    except RuntimeError:
+        return []
 
-    for joint in [root_path] + descendants:
-        short = _short_name(joint)
-        if "Half" in short and "Half_INF" not in short:
-            continue
-        if "_D" in short:
-            continue
-        joints.append(joint)
+    # Depth first from the root itself, so parents come before their children.
+    joints = []
+    dag_iter = om2.MItDag(om2.MItDag.kDepthFirst, om2.MFn.kJoint)
+    dag_iter.reset(root_dag, om2.MItDag.kDepthFirst, om2.MFn.kJoint)
+    while not dag_iter.isDone():
+        path = dag_iter.fullPathName()
+        if not _SKIP_JOINT_RE.search(_short_name(path)):
+            joints.append(path)
+        dag_iter.next()
 
     # Remove duplicates while keeping order.
-    unique = []
-    seen = set()
-    for joint in joints:
-        if joint in seen:
-            continue
-        seen.add(joint)
-        unique.append(joint)
-    return unique
+    return list(dict.fromkeys(joints))
 
 
 def bind_skin_excluding_half():
@@ -69,12 +69,16 @@ def bind_skin_excluding_half():
         cmds.warning(u"ジョイントのルートとバインド対象ジオメトリを選択してください。")
         return
 
-    joint_roots = [node for node in selection if cmds.nodeType(node) == "joint"]
+    # ls -showType returns name/type pairs for the whole selection in one call
+    typed = cmds.ls(selection, long=True, showType=True) or []
+    node_types = dict(zip(typed[::2], typed[1::2]))
+
+    joint_roots = [node for node in selection if node_types.get(node) == "joint"]
     if not joint_roots:
         cmds.warning(u"ジョイントのルートを少なくとも1つ選択してください。")
         return
 
-    geometries = [node for node in selection if _is_bind_geometry(node)]
+    geometries = [node for node in selection if _is_bind_geometry(node, node_types.get(node))]
     if not geometries:
         cmds.warning(u"バインド対象のジオメトリを選択してください。")
         return
@@ -84,19 +88,12 @@ def bind_skin_excluding_half():
         bind_joints.extend(_collect_bind_joints(root))
 
     # Remove duplicates while keeping order.
-    unique_joints = []
-    seen = set()
-    for joint in bind_joints:
-        if joint in seen:
-            continue
-        seen.add(joint)
-        unique_joints.append(joint)
+    unique_joints = list(dict.fromkeys(bind_joints))
 
     if not unique_joints:
         cmds.warning(u"バインドに使用できるジョイントが見つかりませんでした。")
         return
 
-    original_selection = cmds.ls(sl=True, long=True) or []
     cmds.undoInfo(openChunk=True)
     try:
         for geometry in geometries:
@@ -106,8 +103,6 @@ def bind_skin_excluding_half():
                 cmds.warning(u"{0} のスキンバインドに失敗しました: {1}".format(_short_name(geometry), exc))
     finally:
         cmds.undoInfo(closeChunk=True)
-        if original_selection:
-            cmds.select(original_selection, replace=True)
-        else:
-            cmds.select(clear=True)
+        # selection was checked to be non-empty above
+        cmds.select(selection, replace=True)
 
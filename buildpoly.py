@@ -1,12 +1,14 @@
 # -*- coding: utf-8 -*-
+import maya.api.OpenMaya as om2
 import maya.cmds as cmds
 
 
 def _uniquify(name):
-    if not cmds.objExists(name):
+    existing = {node.split("|")[-1] for node in cmds.ls(name + "*") or []}
+    if name not in existing:
         return name
     i = 1
-    while cmds.objExists(f"{name}{i:02d}"):
+    while f"{name}{i:02d}" in existing:
         i += 1
     return f"{name}{i:02d}"
 
@@ -18,8 +20,13 @@ def build_poly(poly_name="CTRL_Loop_POLY"):
 
     cmds.undoInfo(openChunk=True)
     try:
-        pts = [cmds.xform(s, q=True, ws=True, rp=True) for s in sel]
-        pts = [(p[0], p[1], p[2]) for p in pts]
+        sel_list = om2.MSelectionList()
+        for s in sel:
+            sel_list.add(s)
+        pts = [None] * sel_list.length()
+        for i in range(sel_list.length()):
+            pivot = om2.MFnTransform(sel_list.getDagPath(i)).rotatePivot(om2.MSpace.kWorld)
+            pts[i] = (pivot.x, pivot.y, pivot.z)
 
         poly = cmds.polyCreateFacet(p=pts, n=_uniquify(poly_name))[0]
         cmds.select(poly)
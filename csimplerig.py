@@ -1,19 +1,55 @@
 # -*- coding: utf-8 -*-
+import math
+
+import maya.api.OpenMaya as om2
 import maya.cmds as cmds
 
 
 def _uniquify(name):
     """同名があれば連番でユニーク化"""
-    if not cmds.objExists(name):
+    existing = {node.split("|")[-1] for node in cmds.ls(name + "*") or []}
+    if name not in existing:
         return name
     i = 1
-    base = name
-    while cmds.objExists(f"{base}{i:02d}"):
+    while f"{name}{i:02d}" in existing:
         i += 1
-    return f"{base}{i:02d}"
+    return f"{name}{i:02d}"
+
+
+_RESET_VALUES = (
+    ("translate", ("translateX", "translateY", "translateZ"), 0.0),
+    ("rotate", ("rotateX", "rotateY", "rotateZ"), 0.0),
+    ("scale", ("scaleX", "scaleY", "scaleZ"), 1.0),
+)
+
+
+def _reset_transform(node):
+    """ロックされていない translate/rotate/scale を初期値に戻す"""
+    locked = set(cmds.listAttr(node, locked=True) or [])
+    for compound, axes, value in _RESET_VALUES:
+        if compound not in locked and locked.isdisjoint(axes):
+            cmds.setAttr(f"{node}.{compound}", value, value, value)
+            continue
+        for attr in axes:
+            if compound not in locked and attr not in locked:
+                cmds.setAttr(f"{node}.{attr}", value)
 
 
-def simple_rig_from_ctrl_and_joints(grp_suffix="_GRP", ctrl_suffix="_CTRL"):
+def _match_world(dst, src):
+    """ワールド直下の dst を src のワールド位置・回転に合わせる (matchTransform pos/rot 相当)"""
+    selection_list = om2.MSelectionList()
+    selection_list.add(src)
+    matrix = om2.MTransformationMatrix(selection_list.getDagPath(0).inclusiveMatrix())
+    translation = matrix.translation(om2.MSpace.kWorld)
+    rotation = matrix.rotation()
+    cmds.setAttr(f"{dst}.translate", translation.x, translation.y, translation.z)
+    cmds.setAttr(f"{dst}.rotate",
+                 math.degrees(rotation.x), math.degrees(rotation.y), math.degrees(rotation.z))
+
+
+def simple_rig_from_ctrl_and_joints(grp_suffix="_GRP", ctrl_suffix="_CTRL", instance_shapes=False):
+    """instance_shapes=True の場合は複製せずに元コントローラーのシェイプをインスタンスで共有する
+    (全コントローラーの形状が連動する点に注意)"""
     sel = cmds.ls(sl=True, l=True) or []
     if len(sel) < 2:
         cmds.error(u"最初にコントローラー(カーブのトランスフォーム)を1つ、続けてジョイントを1つ以上選択してください。")
@@ -29,6 +65,12 @@ def simple_rig_from_ctrl_and_joints(grp_suffix="_GRP", ctrl_suffix="_CTRL"):
     if not joints:
         cmds.error(u"コントローラーの後にジョイントを1つ以上選択してください。")
 
+    src_shapes = []
+    if instance_shapes:
+        src_shapes = cmds.listRelatives(src_ctrl, s=True, ni=True, f=True) or []
+        if not src_shapes:
+            cmds.error(u"インスタンス化できるシェイプがコントローラーにありません。")
+
     created = []
     cmds.undoInfo(ock=True)
     try:
@@ -38,18 +80,17 @@ def simple_rig_from_ctrl_and_joints(grp_suffix="_GRP", ctrl_suffix="_CTRL"):
             ctrl_name = _uniquify(jnt_short + ctrl_suffix)
 
             grp = cmds.group(em=True, n=grp_name)
-            cmds.matchTransform(grp, jnt, pos=True, rot=True, scl=False)
-
-            dup = cmds.duplicate(src_ctrl, rr=True)[0]
-            dup = cmds.rename(dup, ctrl_name)
-            cmds.parent(dup, grp)
-
-            for attr in ("tx", "ty", "tz", "rx", "ry", "rz"):
-                if cmds.objExists(f"{dup}.{attr}") and not cmds.getAttr(f"{dup}.{attr}", l=True):
-                    cmds.setAttr(f"{dup}.{attr}", 0)
-            for attr in ("sx", "sy", "sz"):
-                if cmds.objExists(f"{dup}.{attr}") and not cmds.getAttr(f"{dup}.{attr}", l=True):
-                    cmds.setAttr(f"{dup}.{attr}", 1)
+            _match_world(grp, jnt)
+
+            if instance_shapes:
+                dup = cmds.group(em=True, n=ctrl_name, p=grp)
+                cmds.parent(src_shapes, dup, add=True, s=True)
+            else:
+                dup = cmds.duplicate(src_ctrl, rr=True)[0]
+                dup = cmds.rename(dup, ctrl_name)
+                cmds.parent(dup, grp)
+
+                _reset_transform(dup)
 
             cmds.parentConstraint(dup, jnt, mo=False)
 